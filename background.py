@@ -0,0 +1,90 @@
+"""
+Scrolling tiled background and frame presentation.
+"""
+import pygame
+
+
+class TiledBackground:
+    """
+    The background tile repeated once into a surface one tile larger than the
+    screen, converted to the display format.  Drawing a frame is a single blit
+    of the screen-sized window at the camera's offset within one tile.
+    """
+
+    def __init__(self, image, screen_size):
+        self.tile = image.convert()
+        self.tile_width, self.tile_height = self.tile.get_size()
+        width, height = screen_size
+        self.screen_rect = pygame.Rect(0, 0, width, height)
+        columns = -(-width // self.tile_width) + 1
+        rows = -(-height // self.tile_height) + 1
+        self.surface = pygame.Surface((columns * self.tile_width, rows * self.tile_height)).convert()
+        for row in range(rows):
+            for column in range(columns):
+                self.surface.blit(self.tile, (column * self.tile_width, row * self.tile_height))
+
+    def offset(self, camera_x, camera_y):
+        return int(camera_x % self.tile_width), int(camera_y % self.tile_height)
+
+    def draw(self, screen, offset):
+        offset_x, offset_y = offset
+        screen.blit(self.surface, (0, 0), self.screen_rect.move(offset_x, offset_y))
+
+    def restore(self, screen, rects, offset):
+        """Redraw the background under each rect only."""
+        offset_x, offset_y = offset
+        surface = self.surface
+        bounds = self.screen_rect
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect:
+                screen.blit(surface, rect, rect.move(offset_x, offset_y))
+
+
+class FramePresenter:
+    """
+    Draws the background at the start of a frame and presents it at the end.
+
+    In dirty-rect mode, drawing code passes the rects it touched to mark().
+    While the background offset stays the same, the next frame only restores
+    the background under last frame's rects and updates the union of last
+    and current rects on the display.  When the camera scrolls the background,
+    the whole screen has changed and the frame is flipped as usual.
+    """
+
+    def __init__(self, background, dirty_rects=False):
+        self.background = background
+        self.dirty_rects = dirty_rects
+        self.previous = []
+        self.current = []
+        self.last_offset = None
+        self.full_frame = True
+
+    def begin(self, screen, camera_x, camera_y):
+        offset = self.background.offset(camera_x, camera_y)
+        self.full_frame = not self.dirty_rects or offset != self.last_offset
+        if self.full_frame:
+            self.background.draw(screen, offset)
+        else:
+            self.background.restore(screen, self.previous, offset)
+        self.last_offset = offset
+        self.current = []
+
+    def mark(self, rect):
+        if self.dirty_rects:
+            self.current.append(rect)
+
+    def mark_all(self, rects):
+        if self.dirty_rects:
+            self.current.extend(rects)
+
+    def present(self):
+        if self.full_frame:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = self.current
+
+    def invalidate(self):
+        """Force a full redraw next frame, e.g. after drawing outside mark()."""
+        self.last_offset = None
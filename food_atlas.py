@@ -0,0 +1,62 @@
+"""
+Pre-rendered food sprites, drawn in batches with Surface.blits.
+"""
+import numpy as np
+import pygame
+
+# Sprites are keyed by color index and on-screen radius in whole pixels
+RADIUS_BITS = 12
+MAX_RADIUS = (1 << RADIUS_BITS) - 1
+GLOW_LAYERS = 4
+
+
+class FoodAtlas:
+    """
+    Food sprites keyed by (color index, radius bucket), rendered on first use.
+
+    The bucket is the integer screen radius the circle would have been drawn
+    with, so batched output matches per-food pygame.draw.circle calls.  With
+    glow enabled each sprite also carries a fading halo twice its radius.
+    """
+
+    def __init__(self, colors, glow=False):
+        self.colors = colors
+        self.glow = glow
+        self.sprites = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def keys(self, color_indices, radii):
+        """Combine color indices and radii into one integer sprite key per food."""
+        return ((color_indices.astype(np.int64) % len(self.colors)) << RADIUS_BITS) | np.minimum(radii, MAX_RADIUS)
+
+    def sprite(self, key):
+        """Return (surface, offset from the food center to its top-left corner)."""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self._render(self.colors[key >> RADIUS_BITS], key & MAX_RADIUS)
+        return sprite
+
+    def _render(self, color, radius):
+        extent = radius * 2 if self.glow else radius
+        surface = pygame.Surface((extent * 2 + 1, extent * 2 + 1), pygame.SRCALPHA)
+        if self.glow:
+            for layer in range(GLOW_LAYERS, 0, -1):
+                alpha = 96 // (layer + 1)
+                pygame.draw.circle(surface, (*color[:3], alpha), (extent, extent), radius + radius * layer // GLOW_LAYERS)
+        pygame.draw.circle(surface, color, (extent, extent), radius)
+        return surface, extent
+
+    def blit_sequence(self, keys, screen_points):
+        """Build the (surface, dest) sequence for Surface.blits."""
+        sprite = self.sprite
+        sequence = []
+        append = sequence.append
+        for key, (x, y) in zip(keys.tolist(), screen_points.tolist()):
+            surface, offset = sprite(key)
+            append((surface, (x - offset, y - offset)))
+        return sequence
+
+    def clear(self):
+        self.sprites.clear()
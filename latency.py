@@ -0,0 +1,107 @@
+"""
+Round-trip time, one-way jitter and server clock estimates for one connection.
+"""
+import time
+from collections import deque
+
+from stats import Histogram
+
+
+class LatencyTracker:
+    """
+    Network timing from ping/pong and the clientbound frame headers.
+
+    RTT: every pong closes the oldest outstanding ping.  srtt and rttvar are
+    the RFC 6298 EWMAs (alpha 1/8, beta 1/4), and all samples also go into a
+    stats.Histogram for percentiles that merge across clients.
+
+    Server timeline: each frame header carries the milliseconds since the
+    server's previous message to this client, so their running sum is the
+    server's send time.  offset = arrival - server time holds the transit
+    delay plus a constant clock difference.  The smallest offset over the last
+    `window` frames is the uncongested baseline; the latest frame's excess over
+    it is `lateness`.  `jitter` is the RFC 3550 interarrival jitter of those
+    offsets.
+
+    Lateness with a steady scheduler means the network stalled.  A stalled
+    client loop also reads frames late, so read it next to the game loop's
+    FrameScheduler jitter.
+    """
+
+    def __init__(self, alpha=1 / 8, beta=1 / 4, window=512):
+        self.alpha = alpha
+        self.beta = beta
+        self.window = window
+        self.pings = deque()
+        self.rtt = None
+        self.srtt = None
+        self.rttvar = None
+        self.rtt_histogram = Histogram()
+
+        self.frames = 0
+        self.server_ms = 0
+        self.last_offset = None
+        self.jitter = 0.0
+        self.lateness = 0.0
+        # (frame number, offset) with increasing offsets: the front is the window minimum
+        self.offset_minimum = deque()
+
+    def ping_sent(self, now=None):
+        self.pings.append(time.perf_counter() if now is None else now)
+
+    def pong_received(self, now=None):
+        """Close the oldest outstanding ping; return its RTT in seconds, or None."""
+        if not self.pings:
+            return None
+        now = time.perf_counter() if now is None else now
+        rtt = now - self.pings.popleft()
+        self.rtt = rtt
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.beta * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.alpha * (rtt - self.srtt)
+        self.rtt_histogram.record(int(rtt * 1e9))
+        return rtt
+
+    def frame_received(self, delta_ms, now=None):
+        now = time.perf_counter() if now is None else now
+        self.server_ms += delta_ms
+        offset = now - self.server_ms / 1000
+        if self.last_offset is not None:
+            self.jitter += (abs(offset - self.last_offset) - self.jitter) / 16
+        self.last_offset = offset
+
+        frame = self.frames
+        self.frames += 1
+        minimum = self.offset_minimum
+        while minimum and minimum[-1][1] >= offset:
+            minimum.pop()
+        minimum.append((frame, offset))
+        if minimum[0][0] <= frame - self.window:
+            minimum.popleft()
+        self.lateness = offset - minimum[0][1]
+
+    def server_time(self, now=None):
+        """Server timeline seconds the server is at now, as seen over an uncongested path."""
+        if not self.offset_minimum:
+            return None
+        now = time.perf_counter() if now is None else now
+        return now - self.offset_minimum[0][1]
+
+    def report(self):
+        """Milliseconds, for logs and the debug overlay."""
+        histogram = self.rtt_histogram
+        return {
+            'rtt_ms': (self.rtt or 0.0) * 1000,
+            'srtt_ms': (self.srtt or 0.0) * 1000,
+            'rttvar_ms': (self.rttvar or 0.0) * 1000,
+            'rtt_p50_ms': histogram.percentile(50) / 1e6,
+            'rtt_p95_ms': histogram.percentile(95) / 1e6,
+            'rtt_p99_ms': histogram.percentile(99) / 1e6,
+            'jitter_ms': self.jitter * 1000,
+            'lateness_ms': self.lateness * 1000,
+            'pings_outstanding': len(self.pings),
+            'frames': self.frames,
+        }
@@ -0,0 +1,65 @@
+"""
+Zoom-dependent level of detail for rendering.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pygame
+
+
+class LodSettings(NamedTuple):
+    # Snake names are only drawn at or above this zoom
+    names_min_zoom: float = 0.5
+    # Below this zoom snake bodies are decimated to about min_segment_px per segment
+    simplify_below_zoom: float = 0.7
+    min_segment_px: float = 6.0
+    # Below this zoom food is drawn as density tiles of food_tile_px screen pixels
+    food_tiles_below_zoom: float = 0.4
+    food_tile_px: int = 12
+    # Food mass that makes a tile fully opaque
+    food_tile_saturation: float = 40.0
+    # Below this zoom prey is drawn as single-pixel points
+    prey_points_below_zoom: float = 0.4
+
+
+def decimate(screen_points, min_segment_px):
+    """
+    Keep roughly one point per min_segment_px of on-screen length.
+
+    Uses a uniform stride from the mean (Manhattan) segment length; the first
+    and last (head) points are always kept.
+    """
+    count = len(screen_points)
+    if count <= 2:
+        return screen_points
+    length = float(np.abs(np.diff(screen_points, axis=0)).sum())
+    stride = int(min_segment_px * (count - 1) / length) if length else count
+    if stride <= 1:
+        return screen_points
+    kept = screen_points[::stride]
+    if (count - 1) % stride:
+        kept = np.concatenate((kept, screen_points[-1:]))
+    return kept
+
+
+def food_density_surface(screen_points, sizes, screen_size, settings, color=(255, 255, 255)):
+    """
+    Render food as a low-resolution density image scaled up to the screen.
+
+    Food mass is summed per food_tile_px tile with bincount and mapped to
+    alpha, so the cost is one small image plus one scale whatever the count.
+    """
+    width, height = screen_size
+    tile = settings.food_tile_px
+    columns = -(-width // tile)
+    rows = -(-height // tile)
+    tile_x = screen_points[:, 0] // tile
+    tile_y = screen_points[:, 1] // tile
+    inside = (tile_x >= 0) & (tile_x < columns) & (tile_y >= 0) & (tile_y < rows)
+    cells = tile_y[inside].astype(np.intp) * columns + tile_x[inside]
+    mass = np.bincount(cells, weights=sizes[inside], minlength=rows * columns)
+    pixels = np.empty((rows, columns, 4), dtype=np.uint8)
+    pixels[..., :3] = color
+    pixels[..., 3] = np.minimum(mass * (255 / settings.food_tile_saturation), 255).reshape(rows, columns)
+    image = pygame.image.frombuffer(pixels.tobytes(), (columns, rows), 'RGBA')
+    return pygame.transform.scale(image, (columns * tile, rows * tile))
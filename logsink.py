@@ -0,0 +1,109 @@
+"""
+Non-blocking log output: a queue-fed logging setup and a binary packet trace.
+
+Log records are handed to a QueueHandler and written by a background
+QueueListener thread, so the event loop never waits on file or console I/O.
+The packet trace stores raw frames instead of hex text.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Trace record: wall-clock timestamp, frame length, then the raw frame
+TRACE_RECORD = struct.Struct('<dI')
+
+
+def setup_logging(level=logging.INFO, log_dir='logs', console=True, max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Route the root logger through a queue to a rotating file (and the console).
+
+    Returns the started QueueListener; call stop() on it to flush at exit.
+    """
+    handlers = []
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        log_filename = os.path.join(log_dir, datetime.now().strftime('%Y%m%d_%H%M%S.log'))
+        handlers.append(logging.handlers.RotatingFileHandler(log_filename, maxBytes=max_bytes, backupCount=backup_count))
+    if console:
+        handlers.append(logging.StreamHandler())
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class PacketTrace:
+    """
+    Binary trace of raw frames, written by a background thread.
+
+    Each record is TRACE_RECORD (timestamp, length) followed by the frame.
+    The file is rotated to path.1 ... path.N once it passes max_bytes.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = queue.SimpleQueue()
+        self.file = open(path, 'ab')
+        self.thread = threading.Thread(target=self._run, name='packet-trace', daemon=True)
+        self.thread.start()
+
+    def write(self, message):
+        self.queue.put((time.time(), message))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            timestamp, message = item
+            self.file.write(TRACE_RECORD.pack(timestamp, len(message)))
+            self.file.write(message)
+            if self.queue.empty():
+                self.file.flush()
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+        self.file.close()
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'ab')
+
+
+def read_trace(path):
+    """Yield (timestamp, frame) pairs from a trace file."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(TRACE_RECORD.size)
+            if len(header) < TRACE_RECORD.size:
+                return
+            timestamp, length = TRACE_RECORD.unpack(header)
+            yield timestamp, f.read(length)
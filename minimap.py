@@ -0,0 +1,51 @@
+"""
+Minimap state decoded from 'u' packets.
+"""
+import numpy as np
+
+MINIMAP_SIZE = 80
+# Literal bytes carry 7 pixels, from the 64-bit down to the 1-bit
+LITERAL_BITS = 7
+PIXEL_OFFSETS = np.arange(LITERAL_BITS)
+
+
+class Minimap:
+    """
+    Persistent 80x80 minimap bitmap.
+
+    Every 'u' packet describes the whole map: bytes >= 128 skip (value - 128)
+    empty pixels, smaller bytes paint up to 7 pixels from their low 7 bits.
+    update() decodes into `bitmap` in place and leaves the cells that differ
+    from the previous frame set in `changed`.  Readers use both arrays directly.
+    """
+
+    def __init__(self, size=MINIMAP_SIZE):
+        self.size = size
+        self.bitmap = np.zeros((size, size), dtype=np.uint8)
+        self.previous = np.zeros((size, size), dtype=np.uint8)
+        self.changed = np.zeros((size, size), dtype=bool)
+        self.changed_count = 0
+        self.frames = 0
+
+    def update(self, data):
+        codes = np.frombuffer(data, dtype=np.uint8)
+        np.copyto(self.previous, self.bitmap)
+        flat = self.bitmap.reshape(-1)
+        flat.fill(0)
+
+        literal = codes < 128
+        # Pixels consumed by each byte, then the pixel each byte starts at
+        advance = np.where(literal, LITERAL_BITS, codes.astype(np.intp) - 128)
+        starts = np.cumsum(advance) - advance
+        bits = np.unpackbits(codes[literal, np.newaxis], axis=1)[:, 8 - LITERAL_BITS:]
+        pixels = (starts[literal, np.newaxis] + PIXEL_OFFSETS)[bits.astype(bool)]
+        flat[pixels[pixels < flat.size]] = 1
+
+        np.not_equal(self.bitmap, self.previous, out=self.changed)
+        self.changed_count = int(np.count_nonzero(self.changed))
+        self.frames += 1
+        return self.changed_count
+
+    def changed_cells(self):
+        """Return (rows, columns) of the cells changed by the last update."""
+        return np.nonzero(self.changed)
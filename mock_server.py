@@ -0,0 +1,681 @@
+"""
+Local stand-in for a protocol v11 game server, for offline load and latency tests.
+
+    python mock_server.py --port 8080 --snakes 100 --tick-rate 10
+    python swarm.py --count 1000 --server ws://127.0.0.1:8080/slither
+
+Sessions log in with the real handshake (StartLogin, the '6' riddle, the
+secret, SetUsernameAndSkin) and then receive traffic from a synthetic world:
+wandering snakes, food in a square of sectors around the map center, and
+prey.  Every session sees the same world; each one also gets a snake of its
+own that only it is told about.
+
+World frames are encoded once per tick and written to every session with
+websockets.broadcast, which never waits for a slow client.  A tick costs one
+encode per frame plus one socket write per frame and session, so --snakes and
+--preys set the per-session load.  --processes runs copies of the server on
+one port (SO_REUSEPORT) with the same seed, so every process simulates the
+same world.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import multiprocessing
+import random
+import string
+import time
+from collections import deque
+
+import numpy as np
+import websockets
+
+from logsink import setup_logging
+from minimap import LITERAL_BITS, MINIMAP_SIZE
+from prediction import DEFAULT_MSL, FRAME_MS, PI2
+from protocol import (ANGLE_8, ANGLE_24, DEAD, FOOD_DTYPE, FOOD_EATEN, FRACTION_24, FULLNESS, HEADER,
+                      INCREASE_ABSOLUTE, INCREASE_RELATIVE, INITIAL_SETUP, LEADERBOARD_ENTRY, LEADERBOARD_HEADER,
+                      MOVE_ABSOLUTE, MOVE_RELATIVE, PREY_ADDED, PREY_EATEN, PREY_UPDATE_DIR_ANG_WANG_SP,
+                      PREY_UPDATE_SP, ROTATION_5, SECTOR, SNAKE_ADDED, SNAKE_REMOVED, decode_secret)
+from scheduler import FrameScheduler
+
+logger = logging.getLogger(__name__)
+
+PACKET_START_LOGIN = 99
+PACKET_SET_USERNAME_AND_SKIN = 115
+PACKET_PING = 251
+PACKET_BOOST_START = 253
+PACKET_BOOST_END = 254
+PROTOCOL_VERSION = 11
+
+# Letters after the header; decode_secret reads frame bytes 17..64
+RIDDLE_LENGTH = 165
+
+# The "typical response" column of the initial setup packet (docs.txt), raw units
+GAME_RADIUS = 21600
+MSCPS = 411
+SECTOR_SIZE = 300
+SECTOR_COUNT_ALONG_EDGE = 144
+SPANGDV = 48
+NSP1 = 539
+NSP2 = 40
+NSP3 = 1400
+MAMU = 33
+MANU2 = 28
+CST = 430
+
+SNAKE_SPEED = NSP1 / 100
+BOOST_SPEED = NSP3 / 100
+PREY_SPEED = 1.5
+SKIN_COUNT = 39
+FOOD_COLOR_COUNT = 9
+PREY_COLOR_COUNT = 9
+
+
+def int24(value):
+    value = int(value) & 0xFFFFFF
+    return value >> 16, value & 0xFFFF
+
+
+def angle8(angle):
+    return int(angle % PI2 / ANGLE_8) & 0xFF
+
+
+def angle24(angle):
+    return int24(angle % PI2 / ANGLE_24)
+
+
+def fraction24(value):
+    return int24(min(max(value, 0.0), 1.0) / FRACTION_24)
+
+
+def frame(msg_type, payload=b''):
+    # Header time 0; Session.stamp sets it on the first frame of a burst
+    return HEADER.pack(0, ord(msg_type)) + payload
+
+
+def encode_minimap(bitmap):
+    """Inverse of Minimap.update: empty runs become skip bytes, the rest 7-pixel literals."""
+    flat = bitmap.reshape(-1)
+    size = flat.size
+    filled = np.flatnonzero(flat).tolist()
+    filled.append(size)
+    data = bytearray()
+    index = 0
+    for next_filled in filled:
+        # Skip up to the next painted pixel, then paint a literal starting there
+        while next_filled - index >= LITERAL_BITS:
+            run = min(next_filled - index, 127)
+            data.append(128 + run)
+            index += run
+        if index >= size:
+            break
+        if next_filled < index:
+            continue
+        value = 0
+        for bit, pixel in enumerate(flat[index:index + LITERAL_BITS].tolist()):
+            if pixel:
+                value |= 1 << (LITERAL_BITS - 1 - bit)
+        data.append(value)
+        index += LITERAL_BITS
+    return bytes(data)
+
+
+def make_riddle(rng):
+    letters = ''.join(rng.choices(string.ascii_letters, k=RIDDLE_LENGTH))
+    return frame('6', letters.encode('ascii'))
+
+
+def parse_username_and_skin(packet):
+    """(nickname, skin) from a SetUsernameAndSkin packet, or None if it is not one."""
+    if len(packet) < 4 or packet[0] != PACKET_SET_USERNAME_AND_SKIN:
+        return None
+    name_len = packet[3]
+    return str(packet[4:4 + name_len], 'utf-8', 'replace'), packet[2]
+
+
+def turn_towards(ang, wang, max_turn):
+    delta = (wang - ang + math.pi) % PI2 - math.pi
+    return (ang + max(-max_turn, min(max_turn, delta))) % PI2
+
+
+class SyntheticSnake:
+    """One server-side snake: integer body parts, tail first, as the client rebuilds them."""
+
+    __slots__ = ('snake_id', 'name', 'skin', 'ang', 'wang', 'sp', 'fam', 'parts', 'x', 'y', 'turned')
+
+    def __init__(self, snake_id, name, skin, x, y, ang, length, sp=SNAKE_SPEED):
+        self.snake_id = snake_id
+        self.name = name
+        self.skin = skin
+        self.ang = ang
+        self.wang = ang
+        self.sp = sp
+        self.fam = 0.0
+        self.turned = False
+        step_x, step_y = math.cos(ang) * DEFAULT_MSL / 2, math.sin(ang) * DEFAULT_MSL / 2
+        self.parts = deque((round(x - step_x * back), round(y - step_y * back)) for back in range(length - 1, -1, -1))
+        self.x, self.y = float(x), float(y)
+
+    def steer(self, rng, center, roam_radius, turn_chance):
+        """Wander, and head back to the center when outside roam_radius."""
+        if math.hypot(self.x - center, self.y - center) > roam_radius:
+            wang = math.atan2(center - self.y, center - self.x) % PI2
+        elif rng.random() < turn_chance:
+            wang = (self.wang + rng.uniform(-1.5, 1.5)) % PI2
+        else:
+            return
+        self.set_wang(wang)
+
+    def set_wang(self, wang):
+        if angle8(wang) != angle8(self.wang):
+            self.turned = True
+        self.wang = wang
+
+    def advance(self, elapsed, grow):
+        """Move the head like the client's predictor does; return the (dx, dy) of the new part."""
+        vfr = elapsed * 1000 / FRAME_MS
+        self.ang = turn_towards(self.ang, self.wang, MAMU / 1000 * vfr)
+        distance = min(self.sp * vfr / 4, DEFAULT_MSL)
+        self.x += math.cos(self.ang) * distance
+        self.y += math.sin(self.ang) * distance
+        head_x, head_y = self.parts[-1]
+        new_x, new_y = round(self.x), round(self.y)
+        self.parts.append((new_x, new_y))
+        if not grow:
+            self.parts.popleft()
+        return new_x - head_x, new_y - head_y
+
+    def added_frame(self):
+        tail_x, tail_y = self.parts[0]
+        body = bytearray()
+        for value in (tail_x * 5, tail_y * 5):
+            body += (int(value) & 0xFFFFFF).to_bytes(3, 'big')
+        previous_x, previous_y = tail_x, tail_y
+        for part_x, part_y in list(self.parts)[1:]:
+            body.append(max(0, min(255, (part_x - previous_x) * 2 + 127)))
+            body.append(max(0, min(255, (part_y - previous_y) * 2 + 127)))
+            previous_x, previous_y = part_x, part_y
+        head_x, head_y = self.parts[-1]
+        name = self.name.encode('utf-8')[:255]
+        direction = 1 if (self.wang - self.ang) % PI2 > math.pi else 2
+        header = SNAKE_ADDED.pack(self.snake_id, *angle24(self.ang), direction + 48, *angle24(self.wang),
+                                  min(int(self.sp * 1000), 0xFFFF), *fraction24(self.fam), self.skin,
+                                  *int24(head_x * 5), *int24(head_y * 5), len(name))
+        return frame('s', header + name + b'\x00' + bytes(body))
+
+    def removed_frame(self, died):
+        return frame('s', SNAKE_REMOVED.pack(self.snake_id, 1 if died else 0))
+
+    def rotation_frame(self):
+        """'4' (clockwise) or 'e' (counterclockwise) with ang, wang and speed."""
+        self.turned = False
+        clockwise = (self.wang - self.ang) % PI2 < math.pi
+        return frame('4' if clockwise else 'e',
+                     ROTATION_5.pack(self.snake_id, angle8(self.ang), angle8(self.wang), min(int(self.sp * 18), 255)))
+
+    def move_frame(self, dx, dy, grow):
+        if -128 <= dx < 128 and -128 <= dy < 128:
+            if grow:
+                return frame('N', INCREASE_RELATIVE.pack(self.snake_id, dx + 128, dy + 128, *fraction24(self.fam)))
+            return frame('G', MOVE_RELATIVE.pack(self.snake_id, dx + 128, dy + 128))
+        head_x, head_y = self.parts[-1]
+        if grow:
+            return frame('n', INCREASE_ABSOLUTE.pack(self.snake_id, head_x, head_y, *fraction24(self.fam)))
+        return frame('g', MOVE_ABSOLUTE.pack(self.snake_id, head_x, head_y))
+
+    def remove_part_frame(self):
+        self.parts.popleft()
+        return frame('r', FULLNESS.pack(self.snake_id, *fraction24(self.fam)))
+
+
+class SyntheticPrey:
+    __slots__ = ('prey_id', 'color', 'x', 'y', 'size', 'ang', 'wang', 'sp')
+
+    def __init__(self, prey_id, color, x, y, size, ang):
+        self.prey_id = prey_id
+        self.color = color
+        self.x = x
+        self.y = y
+        self.size = size
+        self.ang = ang
+        self.wang = ang
+        self.sp = PREY_SPEED
+
+    def direction(self):
+        return 2 if (self.wang - self.ang) % PI2 < math.pi else 1
+
+    def added_frame(self):
+        return frame('y', PREY_ADDED.pack(self.prey_id, self.color, *int24(self.x * 5), *int24(self.y * 5),
+                                          min(int(self.size * 5), 255), self.direction() + 48,
+                                          *angle24(self.wang), *angle24(self.ang), int(self.sp * 1000)))
+
+    def update_frame(self, turned):
+        # 'j' positions are (value * 3 + 1)
+        x, y = max(0, int(self.x - 1) // 3), max(0, int(self.y - 1) // 3)
+        if turned:
+            return frame('j', PREY_UPDATE_DIR_ANG_WANG_SP.pack(self.prey_id, x, y, self.direction() + 48,
+                                                               *angle24(self.ang), *angle24(self.wang),
+                                                               int(self.sp * 1000)))
+        return frame('j', PREY_UPDATE_SP.pack(self.prey_id, x, y, int(self.sp * 1000)))
+
+
+class SyntheticWorld:
+    """
+    Snakes, food and prey inside a square of `sectors` x `sectors` sectors at the map center.
+
+    tick() advances everything by the elapsed time and returns the frames that
+    describe the change; join_frames() describes the whole world to a new session.
+    """
+
+    def __init__(self, snakes=50, preys=20, foods_per_sector=20, sectors=8, body_length=30, food_churn=5,
+                 turn_chance=0.02, grow_chance=0.05, death_chance=0.0005, sector_interval=5.0, report_interval=1.0,
+                 seed=None):
+        self.rng = random.Random(seed)
+        self.center = GAME_RADIUS
+        self.sectors = sectors
+        self.first_sector = self.center // SECTOR_SIZE - sectors // 2
+        self.roam_radius = sectors * SECTOR_SIZE * 0.4
+        self.body_length = body_length
+        self.food_churn = food_churn
+        self.turn_chance = turn_chance
+        self.grow_chance = grow_chance
+        self.death_chance = death_chance
+        self.sector_interval = sector_interval
+        self.report_interval = report_interval
+        self.since_sector_cycle = 0.0
+        self.since_report = 0.0
+        self.next_prey_id = 1
+
+        rng = self.rng
+        self.snakes = [self.make_snake(snake_id) for snake_id in range(1, snakes + 1)]
+        # Sector (x, y) -> FOOD_DTYPE array; eaten food is replaced in place
+        self.foods = {}
+        for sector_y in range(self.first_sector, self.first_sector + sectors):
+            for sector_x in range(self.first_sector, self.first_sector + sectors):
+                foods = np.empty(foods_per_sector, dtype=FOOD_DTYPE)
+                for index in range(foods_per_sector):
+                    foods[index] = self.random_food(sector_x, sector_y)
+                self.foods[sector_x, sector_y] = foods
+        self.preys = [self.make_prey() for _ in range(preys)]
+
+    def random_point(self):
+        half = self.sectors * SECTOR_SIZE / 2 - SECTOR_SIZE / 2
+        return (self.center + self.rng.uniform(-half, half), self.center + self.rng.uniform(-half, half))
+
+    def random_food(self, sector_x, sector_y):
+        rng = self.rng
+        return (rng.randrange(FOOD_COLOR_COUNT), sector_x * SECTOR_SIZE + rng.randrange(SECTOR_SIZE),
+                sector_y * SECTOR_SIZE + rng.randrange(SECTOR_SIZE), rng.randrange(5, 60))
+
+    def make_snake(self, snake_id):
+        rng = self.rng
+        return SyntheticSnake(snake_id, f"Mock{snake_id}", rng.randrange(SKIN_COUNT), *self.random_point(),
+                              rng.uniform(0, PI2), self.body_length)
+
+    def make_prey(self):
+        prey_id = self.next_prey_id
+        self.next_prey_id = self.next_prey_id % 0xFFFF + 1
+        rng = self.rng
+        return SyntheticPrey(prey_id, rng.randrange(PREY_COLOR_COUNT), *self.random_point(), rng.uniform(3, 10),
+                             rng.uniform(0, PI2))
+
+    def sector_of(self, x, y):
+        return int(x) // SECTOR_SIZE, int(y) // SECTOR_SIZE
+
+    def setup_frame(self):
+        return frame('a', INITIAL_SETUP.pack(*int24(GAME_RADIUS), MSCPS, SECTOR_SIZE, SECTOR_COUNT_ALONG_EDGE,
+                                             SPANGDV, NSP1, NSP2, NSP3, MAMU, MANU2, CST, PROTOCOL_VERSION))
+
+    def sector_frames(self, sector_x, sector_y):
+        return [frame('W', SECTOR.pack(sector_x, sector_y)), frame('F', self.foods[sector_x, sector_y].tobytes())]
+
+    def join_frames(self):
+        frames = []
+        for sector_x, sector_y in self.foods:
+            frames += self.sector_frames(sector_x, sector_y)
+        frames += [snake.added_frame() for snake in self.snakes]
+        frames += [prey.added_frame() for prey in self.preys]
+        frames.append(self.leaderboard_frame())
+        frames.append(self.minimap_frame())
+        return frames
+
+    def tick(self, elapsed):
+        frames = []
+        rng = self.rng
+        for index, snake in enumerate(self.snakes):
+            if rng.random() < self.death_chance:
+                # Died: the client removes it ('s' with status 1), then it respawns under the same id
+                frames.append(snake.removed_frame(True))
+                snake = self.snakes[index] = self.make_snake(snake.snake_id)
+                frames.append(snake.added_frame())
+                continue
+            snake.steer(rng, self.center, self.roam_radius, self.turn_chance)
+            if snake.turned:
+                frames.append(snake.rotation_frame())
+            grow = rng.random() < self.grow_chance
+            if grow:
+                snake.fam = (snake.fam + 0.25) % 1.0
+            dx, dy = snake.advance(elapsed, grow)
+            frames.append(snake.move_frame(dx, dy, grow))
+            if len(snake.parts) > self.body_length * 2:
+                frames.append(snake.remove_part_frame())
+
+        frames += self.churn_food()
+        frames += self.move_preys(elapsed)
+
+        self.since_sector_cycle += elapsed
+        if self.sector_interval and self.since_sector_cycle >= self.sector_interval:
+            self.since_sector_cycle = 0.0
+            frames += self.cycle_sector()
+        self.since_report += elapsed
+        if self.since_report >= self.report_interval:
+            self.since_report = 0.0
+            frames.append(self.leaderboard_frame())
+            frames.append(self.minimap_frame())
+        return frames
+
+    def churn_food(self):
+        """Eat food_churn foods ('c') and put new ones in their place ('f' and 'b')."""
+        frames = []
+        rng = self.rng
+        sectors = list(self.foods)
+        for churn in range(self.food_churn):
+            sector_x, sector_y = rng.choice(sectors)
+            foods = self.foods[sector_x, sector_y]
+            if not len(foods):
+                continue
+            index = rng.randrange(len(foods))
+            eater = rng.choice(self.snakes).snake_id if self.snakes else 0
+            frames.append(frame('c', FOOD_EATEN.pack(int(foods[index]['x']), int(foods[index]['y']), eater)))
+            foods[index] = self.random_food(sector_x, sector_y)
+            frames.append(frame('b' if churn % 2 else 'f', foods[index:index + 1].tobytes()))
+        return frames
+
+    def move_preys(self, elapsed):
+        frames = []
+        rng = self.rng
+        vfr = elapsed * 1000 / FRAME_MS
+        for index, prey in enumerate(self.preys):
+            if self.snakes and rng.random() < 0.002:
+                # Eaten: the client drops it, then a new prey appears elsewhere
+                frames.append(frame('y', PREY_EATEN.pack(prey.prey_id, rng.choice(self.snakes).snake_id)))
+                prey = self.preys[index] = self.make_prey()
+                frames.append(prey.added_frame())
+                continue
+            turned = False
+            if math.hypot(prey.x - self.center, prey.y - self.center) > self.roam_radius:
+                prey.wang = math.atan2(self.center - prey.y, self.center - prey.x) % PI2
+                turned = True
+            elif rng.random() < self.turn_chance:
+                prey.wang = rng.uniform(0, PI2)
+                turned = True
+            prey.ang = turn_towards(prey.ang, prey.wang, MANU2 / 1000 * vfr)
+            distance = prey.sp * vfr / 4
+            prey.x += math.cos(prey.ang) * distance
+            prey.y += math.sin(prey.ang) * distance
+            frames.append(prey.update_frame(turned))
+        return frames
+
+    def cycle_sector(self):
+        """Unload a random sector ('w') and load it again ('W', 'F', and the prey inside it)."""
+        sector_x, sector_y = self.rng.choice(list(self.foods))
+        frames = [frame('w', SECTOR.pack(sector_x, sector_y))]
+        frames += self.sector_frames(sector_x, sector_y)
+        frames += [prey.added_frame() for prey in self.preys
+                   if self.sector_of(prey.x, prey.y) == (sector_x, sector_y)]
+        return frames
+
+    def leaderboard_frame(self):
+        top = sorted(self.snakes, key=lambda snake: len(snake.parts), reverse=True)[:10]
+        payload = bytearray(LEADERBOARD_HEADER.pack(0, 0, len(self.snakes)))
+        for snake in top:
+            name = snake.name.encode('utf-8')[:255]
+            payload += LEADERBOARD_ENTRY.pack(len(snake.parts), *fraction24(snake.fam), snake.skin, len(name)) + name
+        return frame('l', bytes(payload))
+
+    def minimap_frame(self):
+        bitmap = np.zeros((MINIMAP_SIZE, MINIMAP_SIZE), dtype=np.uint8)
+        scale = MINIMAP_SIZE / (GAME_RADIUS * 2)
+        for snake in self.snakes:
+            column = min(MINIMAP_SIZE - 1, max(0, int(snake.x * scale)))
+            row = min(MINIMAP_SIZE - 1, max(0, int(snake.y * scale)))
+            bitmap[row, column] = 1
+        return frame('u', encode_minimap(bitmap))
+
+
+class Session:
+    """
+    One logged in client.
+
+    A frame header holds the milliseconds since the previous frame to this
+    client.  last_sent advances by exactly the milliseconds written, so the
+    client's running sum of headers stays on the server clock.
+    """
+
+    __slots__ = ('websocket', 'snake', 'joined', 'alive', 'last_sent')
+
+    def __init__(self, websocket, snake):
+        self.websocket = websocket
+        self.snake = snake
+        self.joined = self.last_sent = time.perf_counter()
+        self.alive = True
+
+    def stamp(self, message, now):
+        elapsed_ms = min(int((now - self.last_sent) * 1000), 0xFFFF)
+        self.last_sent += elapsed_ms / 1000
+        return elapsed_ms.to_bytes(2, 'big') + message[2:]
+
+
+class MockServer:
+    """
+    Serves the handshake and broadcasts one SyntheticWorld to every logged in session.
+
+    Player snakes take ids after the world's snakes.  With player_lifetime set,
+    a session's snake dies ('v') that many seconds after joining, which
+    exercises the client's death handling and the swarm's respawn.
+    """
+
+    def __init__(self, world, tick_rate=10, player_lifetime=None, report_interval=10.0, seed=None):
+        self.world = world
+        self.tick_rate = tick_rate
+        self.player_lifetime = player_lifetime
+        self.report_interval = report_interval
+        self.rng = random.Random(seed)
+        self.sessions = set()
+        self.next_player_id = len(world.snakes) + 1
+        self.connections = 0
+        self.rejected = 0
+        self.frames_sent = 0
+
+    async def serve(self, host, port, reuse_port=False):
+        async with websockets.serve(self.handle_connection, host, port, compression=None, ping_interval=None,
+                                    max_size=2 ** 16, backlog=4096, reuse_port=reuse_port):
+            logger.info("Mock server listening on ws://%s:%s/slither", host, port)
+            tasks = [asyncio.create_task(self.run_ticks())]
+            if self.report_interval:
+                tasks.append(asyncio.create_task(self.report_periodically()))
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def handle_connection(self, websocket):
+        self.connections += 1
+        session = None
+        try:
+            login = await self.handshake(websocket)
+            if login is None:
+                self.rejected += 1
+                await websocket.close()
+                return
+            session = await self.join(websocket, *login)
+            async for message in websocket:
+                await self.handle_packet(session, message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+            if session is not None:
+                self.sessions.discard(session)
+
+    async def handshake(self, websocket):
+        """StartLogin, riddle and secret, SetUsernameAndSkin; (nickname, skin) or None on a bad login."""
+        if await websocket.recv() != bytes((PACKET_START_LOGIN,)):
+            return None
+        riddle = make_riddle(self.rng)
+        await websocket.send(riddle)
+        if await websocket.recv() != bytes(decode_secret(riddle)):
+            logger.warning("Rejected a session with a wrong secret")
+            return None
+        return parse_username_and_skin(await websocket.recv())
+
+    async def join(self, websocket, nickname, skin):
+        world = self.world
+        player_id = self.next_player_id
+        self.next_player_id = max(len(world.snakes) + 1, (self.next_player_id + 1) % 0x10000)
+        snake = SyntheticSnake(player_id, nickname, skin % SKIN_COUNT, *world.random_point(),
+                               self.rng.uniform(0, PI2), world.body_length)
+        # The first 's' tells the client which snake is its own
+        frames = [world.setup_frame(), snake.added_frame()] + world.join_frames()
+        for message in frames:
+            await websocket.send(message)
+        self.frames_sent += len(frames)
+        session = Session(websocket, snake)
+        self.sessions.add(session)
+        return session
+
+    async def handle_packet(self, session, message):
+        if isinstance(message, str) or not message:
+            return
+        first = message[0]
+        snake = session.snake
+        if len(message) == 2:
+            # Steering: wanted angle as a byte, then the speed bits
+            snake.set_wang(first * ANGLE_8)
+        elif len(message) > 2:
+            # The client's play packet repeats SetUsernameAndSkin; it and anything else long is ignored
+            return
+        elif first == PACKET_PING:
+            await session.websocket.send(session.stamp(frame('p'), time.perf_counter()))
+            self.frames_sent += 1
+        elif first in (PACKET_BOOST_START, PACKET_BOOST_END):
+            snake.sp = BOOST_SPEED if first == PACKET_BOOST_START else SNAKE_SPEED
+            snake.turned = True
+        elif first <= 250:
+            # mouseMove: angle in radians = 2pi * value / 250
+            snake.set_wang(first * PI2 / 250)
+
+    async def run_ticks(self):
+        scheduler = FrameScheduler(self.tick_rate)
+        last_tick = time.perf_counter()
+        while True:
+            scheduler.begin_frame()
+            now = time.perf_counter()
+            self.tick(now - last_tick)
+            last_tick = now
+            await scheduler.sleep_async()
+
+    def tick(self, elapsed):
+        frames = self.world.tick(elapsed)
+        now = time.perf_counter()
+        sessions = [session for session in self.sessions
+                    if session.alive and not session.websocket.transport.is_closing()]
+        # Each session's own frames go first; the first of them carries the header delta
+        for session in sessions:
+            messages = self.player_frames(session, elapsed, now)
+            messages[0] = session.stamp(messages[0], now)
+            for message in messages:
+                websockets.broadcast((session.websocket,), message)
+            self.frames_sent += len(messages)
+        connections = [session.websocket for session in sessions if session.alive]
+        for message in frames:
+            websockets.broadcast(connections, message)
+        self.frames_sent += len(frames) * len(connections)
+
+    def player_frames(self, session, elapsed, now):
+        snake = session.snake
+        if self.player_lifetime is not None and now - session.joined >= self.player_lifetime:
+            session.alive = False
+            return [frame('v', DEAD.pack(0))]
+        snake.steer(self.rng, self.world.center, self.world.roam_radius, 0)
+        messages = [snake.rotation_frame()] if snake.turned else []
+        dx, dy = snake.advance(elapsed, False)
+        messages.append(snake.move_frame(dx, dy, False))
+        return messages
+
+    async def report_periodically(self):
+        last_sent = 0
+        while True:
+            await asyncio.sleep(self.report_interval)
+            sent, last_sent = self.frames_sent - last_sent, self.frames_sent
+            logger.info("Mock server: %s connections, %s playing, %s rejected, %.0f frames/s",
+                        self.connections, len(self.sessions), self.rejected, sent / self.report_interval)
+
+
+def run_server(options, reuse_port):
+    world = SyntheticWorld(snakes=options.snakes, preys=options.preys, foods_per_sector=options.foods_per_sector,
+                           sectors=options.sectors, body_length=options.body_length, food_churn=options.food_churn,
+                           seed=options.seed)
+    server = MockServer(world, tick_rate=options.tick_rate, player_lifetime=options.player_lifetime,
+                        report_interval=options.report_interval, seed=options.seed)
+    asyncio.run(server.serve(options.host, options.port, reuse_port=reuse_port))
+
+
+def run_process(options):
+    log_listener = setup_logging(level=logging.WARNING, log_dir=None)
+    logger.setLevel(logging.INFO)
+    try:
+        run_server(options, reuse_port=True)
+    finally:
+        log_listener.stop()
+
+
+def raise_file_limit():
+    """Lift the open file limit to its hard maximum; every connection is a file descriptor."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline slither.io protocol v11 server with a synthetic world.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--snakes', type=int, default=50)
+    parser.add_argument('--preys', type=int, default=20)
+    parser.add_argument('--foods-per-sector', type=int, default=20)
+    parser.add_argument('--sectors', type=int, default=8, help="edge of the square of sectors holding the world")
+    parser.add_argument('--body-length', type=int, default=30)
+    parser.add_argument('--food-churn', type=int, default=5, help="foods eaten and replaced per tick")
+    parser.add_argument('--tick-rate', type=float, default=10)
+    parser.add_argument('--player-lifetime', type=float, default=None, help="seconds before a player snake dies")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--report-interval', type=float, default=10.0)
+    args = parser.parse_args()
+
+    raise_file_limit()
+    if args.processes <= 1:
+        run_server(args, reuse_port=False)
+        return
+    processes = [multiprocessing.Process(target=run_process, args=(args,), daemon=True)
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    log_listener = setup_logging(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    try:
+        main()
+    finally:
+        log_listener.stop()
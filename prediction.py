@@ -0,0 +1,121 @@
+"""
+Client-side snake motion prediction between server updates.
+
+Implements the reference client's per-frame movement model (docs.txt):
+
+    sc = min(6, 1 + (sct - 2) / 106)
+    scang = .13 + .87 * ((7 - sc) / 6) ** 2
+    spang = min(1, sp / spangdv)
+    eang = mamu * vfr * scang * spang
+
+where vfr is elapsed time in 8 ms frames.  Snakes turn by eang per step
+towards wang in their rotation direction and move sp * vfr / 4 along ang.
+"""
+import math
+
+import numpy as np
+
+FRAME_MS = 8
+# Default body part spacing; a head never moves more than this per step
+DEFAULT_MSL = 42
+PI2 = 2 * math.pi
+
+# Rotation directions, as in the snake add packet and the reference client
+DIR_NONE = 0
+DIR_COUNTERCLOCKWISE = 1
+DIR_CLOCKWISE = 2
+
+
+def wrap_angle(angle):
+    return np.mod(angle, PI2)
+
+
+def angle_delta(target, angle):
+    """Signed shortest difference target - angle in (-pi, pi]."""
+    delta = np.mod(target - angle, PI2)
+    return np.where(delta > math.pi, delta - PI2, delta)
+
+
+class MotionPredictor:
+    """
+    Extrapolates every snake's head with the server's physics constants.
+
+    step() advances the predicted heads (pred_x/pred_y columns of the
+    SnakeStore) and the heading of all live snakes at once.  When a move or
+    increase packet lands, reconcile() snaps the prediction to the server head
+    and keeps the difference as an error offset that decays over
+    error_half_life seconds, so the drawn head converges instead of jumping.
+    """
+
+    def __init__(self, error_half_life=0.1):
+        # Hard-coded defaults of the reference client until the setup packet
+        self.spangdv = 4.8
+        self.nsp1 = 4.25
+        self.nsp2 = 0.5
+        self.nsp3 = 12
+        self.mamu = 0.033
+        self.manu2 = 0.028
+        self.cst = 0.43
+        self.msl = DEFAULT_MSL
+        self.error_half_life = error_half_life
+
+    def configure(self, setup):
+        """Take the constants from an InitialSetup record (raw packet units)."""
+        self.spangdv = setup.spangdv / 10
+        self.nsp1 = setup.nsp1 / 100
+        self.nsp2 = setup.nsp2 / 100
+        self.nsp3 = setup.nsp3 / 100
+        self.mamu = setup.mamu / 1000
+        self.manu2 = setup.manu2 / 1000
+        self.cst = setup.cst / 1000
+
+    def reset(self, snakes, slot):
+        snakes.pred_x[slot] = snakes.head_x[slot]
+        snakes.pred_y[slot] = snakes.head_y[slot]
+        snakes.err_x[slot] = 0
+        snakes.err_y[slot] = 0
+
+    def reconcile(self, snakes, slot, x, y):
+        """A server head arrived: fold the prediction error into the decaying offset."""
+        snakes.err_x[slot] += snakes.pred_x[slot] - x
+        snakes.err_y[slot] += snakes.pred_y[slot] - y
+        snakes.pred_x[slot] = x
+        snakes.pred_y[slot] = y
+
+    def step(self, snakes, elapsed):
+        slots = snakes.live_slots()
+        if not len(slots) or elapsed <= 0:
+            return
+        vfr = elapsed * 1000 / FRAME_MS
+
+        sp = snakes.sp[slots]
+        sc = np.minimum(6, 1 + (snakes.length[slots] - 2) / 106)
+        scang = .13 + .87 * ((7 - sc) / 6) ** 2
+        spang = np.minimum(sp / self.spangdv, 1)
+        eang = self.mamu * vfr * scang * spang
+
+        ang = snakes.ang[slots].astype(np.float64)
+        wang = snakes.wang[slots]
+        direction = snakes.dir[slots]
+        counterclockwise = direction == DIR_COUNTERCLOCKWISE
+        clockwise = direction == DIR_CLOCKWISE
+        ang = wrap_angle(ang - np.where(counterclockwise, eang, 0) + np.where(clockwise, eang, 0))
+        remaining = angle_delta(wang, ang)
+        # Turning past the wanted angle stops on it, as does having no direction
+        reached = (counterclockwise & (remaining > 0)) | (clockwise & (remaining < 0)) | ~(counterclockwise | clockwise)
+        ang = np.where(reached, wang, ang)
+        snakes.ang[slots] = ang
+        snakes.dir[slots] = np.where(reached, DIR_NONE, direction)
+
+        distance = np.minimum(sp * vfr / 4, self.msl)
+        snakes.pred_x[slots] += np.cos(ang) * distance
+        snakes.pred_y[slots] += np.sin(ang) * distance
+
+        decay = 0.5 ** (elapsed / self.error_half_life)
+        snakes.err_x[slots] *= decay
+        snakes.err_y[slots] *= decay
+
+    def heads(self, snakes, slots):
+        """Predicted head positions to draw, as (n, 2) float arrays."""
+        return np.column_stack((snakes.pred_x[slots] + snakes.err_x[slots],
+                                snakes.pred_y[slots] + snakes.err_y[slots]))
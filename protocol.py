@@ -0,0 +1,609 @@
+"""
+Decoder for clientbound slither.io protocol v11 messages (see docs.txt).
+
+Every layout is a precompiled struct.Struct that is read with unpack_from at a
+fixed offset into a memoryview of the whole frame, so no intermediate slices
+are made.  Each decoder returns a typed record with values already converted
+to the units the client uses.
+"""
+import math
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Every clientbound frame: 2 bytes time since last message, 1 byte message type
+HEADER = struct.Struct('!HB')
+PAYLOAD_OFFSET = HEADER.size
+
+ANGLE_8 = 2 * math.pi / 256
+ANGLE_24 = 2 * math.pi / 16777215
+FRACTION_24 = 1 / 16777215
+
+# int24 fields are read as a (high byte, low uint16) pair
+INITIAL_SETUP = struct.Struct('!BHHHHBHHHHHHB')
+SNAKE_ID = struct.Struct('!H')
+MOVE_ABSOLUTE = struct.Struct('!HHH')
+MOVE_RELATIVE = struct.Struct('!HBB')
+INCREASE_ABSOLUTE = struct.Struct('!HHHBH')
+INCREASE_RELATIVE = struct.Struct('!HBBBH')
+FULLNESS = struct.Struct('!HBH')
+LEADERBOARD_HEADER = struct.Struct('!BHH')
+LEADERBOARD_ENTRY = struct.Struct('!HBHBB')
+DEAD = struct.Struct('!B')
+SECTOR = struct.Struct('!BB')
+GLOBAL_HIGHSCORE = struct.Struct('!BHBHB')
+SNAKE_REMOVED = struct.Struct('!HB')
+SNAKE_ADDED = struct.Struct('!HBHBBHHBHBBHBHB')
+# Food packets carry 6-byte entries that are decoded in bulk as a structured array
+FOOD_DTYPE = np.dtype([('color', 'u1'), ('x', '>u2'), ('y', '>u2'), ('size', 'u1')])
+FOOD_EATEN = struct.Struct('!HHH')
+FOOD_EATEN_NO_EATER = struct.Struct('!HH')
+PREY_POSITION = struct.Struct('!HHH')
+PREY_EATEN = struct.Struct('!HH')
+PREY_ADDED = struct.Struct('!HBBHBHBBBHBHH')
+KILL = struct.Struct('!HBH')
+
+# Rotation packets: snake id followed by one byte per field, layout chosen by payload length
+ROTATION_3 = struct.Struct('!HB')
+ROTATION_4 = struct.Struct('!HBB')
+ROTATION_5 = struct.Struct('!HBBB')
+
+# Prey update packets: id and position followed by a field set chosen by payload length
+PREY_UPDATE_SP = struct.Struct('!HHHH')
+PREY_UPDATE_ANG = struct.Struct('!HHHBH')
+PREY_UPDATE_DIR_WANG = struct.Struct('!HHHBBH')
+PREY_UPDATE_ANG_SP = struct.Struct('!HHHBHH')
+PREY_UPDATE_DIR_WANG_SP = struct.Struct('!HHHBBHH')
+PREY_UPDATE_DIR_ANG_WANG = struct.Struct('!HHHBBHBH')
+PREY_UPDATE_DIR_ANG_WANG_SP = struct.Struct('!HHHBBHBHH')
+
+
+class PreInit(NamedTuple):
+    text: str
+
+
+class InitialSetup(NamedTuple):
+    game_radius: int
+    mscps: int
+    sector_size: int
+    sector_count_along_edge: int
+    spangdv: int
+    nsp1: int
+    nsp2: int
+    nsp3: int
+    mamu: int
+    manu2: int
+    cst: int
+    protocol_version: int
+
+
+class Rotation(NamedTuple):
+    snake_id: int
+    clockwise: bool
+    ang: Optional[float]
+    wang: Optional[float]
+    sp: Optional[float]
+
+
+class Fullness(NamedTuple):
+    snake_id: int
+    fam: float
+
+
+class RemovePart(NamedTuple):
+    snake_id: int
+    fam: Optional[float]
+
+
+class Move(NamedTuple):
+    snake_id: int
+    x: int
+    y: int
+    relative: bool
+
+
+class Increase(NamedTuple):
+    snake_id: int
+    x: int
+    y: int
+    relative: bool
+    fam: float
+
+
+class LeaderboardEntry(NamedTuple):
+    sct: int
+    fam: float
+    color: int
+    name: str
+
+
+class Leaderboard(NamedTuple):
+    leaderboard_rank: int
+    player_rank: int
+    player_count: int
+    entries: list
+
+
+class Dead(NamedTuple):
+    reason: int
+
+
+class Sector(NamedTuple):
+    x: int
+    y: int
+
+
+class GlobalHighscore(NamedTuple):
+    sct: int
+    fam: float
+    name: str
+    message: str
+
+
+class Pong(NamedTuple):
+    pass
+
+
+class MinimapUpdate(NamedTuple):
+    data: memoryview
+
+
+class SnakeRemoved(NamedTuple):
+    snake_id: int
+    died: bool
+
+
+class SnakeAdded(NamedTuple):
+    snake_id: int
+    ehang: float
+    dir: int
+    wang: float
+    speed: float
+    fam: float
+    skin: int
+    x: float
+    y: float
+    name: str
+    custom_skin: Optional[bytes]
+    body: np.ndarray
+
+
+class FoodBatch(NamedTuple):
+    foods: np.ndarray
+
+
+class FoodEaten(NamedTuple):
+    x: int
+    y: int
+    eater_snake_id: Optional[int]
+
+
+class PreyUpdate(NamedTuple):
+    prey_id: int
+    x: int
+    y: int
+    dir: Optional[int]
+    ang: Optional[float]
+    wang: Optional[float]
+    sp: Optional[float]
+
+
+class PreyRemoved(NamedTuple):
+    prey_id: int
+    eater_snake_id: Optional[int]
+
+
+class PreyAdded(NamedTuple):
+    prey_id: int
+    color: int
+    x: float
+    y: float
+    size: float
+    dir: int
+    wang: float
+    ang: float
+    speed: float
+
+
+class VerifyCode(NamedTuple):
+    data: memoryview
+
+
+class Kill(NamedTuple):
+    killer_snake_id: int
+    total_kills: int
+
+
+def _text(view, start, end):
+    return str(view[start:end], 'utf-8', 'replace')
+
+
+def decode_pre_init(view, size):
+    return PreInit(str(view[PAYLOAD_OFFSET:size], 'latin-1'))
+
+
+def decode_initial_setup(view, size):
+    (radius_hi, radius_lo, mscps, sector_size, sector_count_along_edge, spangdv,
+     nsp1, nsp2, nsp3, mamu, manu2, cst, protocol_version) = INITIAL_SETUP.unpack_from(view, PAYLOAD_OFFSET)
+    return InitialSetup((radius_hi << 16) | radius_lo, mscps, sector_size, sector_count_along_edge, spangdv,
+                        nsp1, nsp2, nsp3, mamu, manu2, cst, protocol_version)
+
+
+def decode_rotation_e5(view, size):
+    snake_id, ang, wang, sp = ROTATION_5.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, ang * ANGLE_8, wang * ANGLE_8, sp / 18)
+
+
+def decode_rotation_e4(view, size):
+    snake_id, ang, sp = ROTATION_4.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, ang * ANGLE_8, None, sp / 18)
+
+
+def decode_rotation_e3(view, size):
+    snake_id, ang = ROTATION_3.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, ang * ANGLE_8, None, None)
+
+
+def decode_rotation_E4(view, size):
+    snake_id, wang, sp = ROTATION_4.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, None, wang * ANGLE_8, sp / 18)
+
+
+def decode_rotation_E3(view, size):
+    snake_id, wang = ROTATION_3.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, None, wang * ANGLE_8, None)
+
+
+def decode_rotation_34(view, size):
+    snake_id, ang, wang = ROTATION_4.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, ang * ANGLE_8, wang * ANGLE_8, None)
+
+
+def decode_rotation_33(view, size):
+    snake_id, sp = ROTATION_3.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, False, None, None, sp / 18)
+
+
+def decode_rotation_45(view, size):
+    snake_id, ang, wang, sp = ROTATION_5.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, True, ang * ANGLE_8, wang * ANGLE_8, sp / 18)
+
+
+def decode_rotation_44(view, size):
+    snake_id, wang, sp = ROTATION_4.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, True, None, wang * ANGLE_8, sp / 18)
+
+
+def decode_rotation_54(view, size):
+    snake_id, ang, wang = ROTATION_4.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, True, ang * ANGLE_8, wang * ANGLE_8, None)
+
+
+def decode_rotation_clockwise_wang(view, size):
+    # '4' and '5' with a 3-byte payload carry the same fields
+    snake_id, wang = ROTATION_3.unpack_from(view, PAYLOAD_OFFSET)
+    return Rotation(snake_id, True, None, wang * ANGLE_8, None)
+
+
+def decode_unexpected_length(view, size):
+    raise struct.error(f"unexpected length {size} for packet '{chr(view[2])}'")
+
+
+def decode_fullness(view, size):
+    snake_id, fam_hi, fam_lo = FULLNESS.unpack_from(view, PAYLOAD_OFFSET)
+    return Fullness(snake_id, ((fam_hi << 16) | fam_lo) * FRACTION_24)
+
+
+def decode_remove_part(view, size):
+    snake_id, fam_hi, fam_lo = FULLNESS.unpack_from(view, PAYLOAD_OFFSET)
+    return RemovePart(snake_id, ((fam_hi << 16) | fam_lo) * FRACTION_24)
+
+
+def decode_remove_part_only(view, size):
+    snake_id, = SNAKE_ID.unpack_from(view, PAYLOAD_OFFSET)
+    return RemovePart(snake_id, None)
+
+
+def decode_move_absolute(view, size):
+    snake_id, x, y = MOVE_ABSOLUTE.unpack_from(view, PAYLOAD_OFFSET)
+    return Move(snake_id, x, y, False)
+
+
+def decode_move_relative(view, size):
+    snake_id, dx, dy = MOVE_RELATIVE.unpack_from(view, PAYLOAD_OFFSET)
+    return Move(snake_id, dx - 128, dy - 128, True)
+
+
+def decode_increase_absolute(view, size):
+    snake_id, x, y, fam_hi, fam_lo = INCREASE_ABSOLUTE.unpack_from(view, PAYLOAD_OFFSET)
+    return Increase(snake_id, x, y, False, ((fam_hi << 16) | fam_lo) * FRACTION_24)
+
+
+def decode_increase_relative(view, size):
+    snake_id, dx, dy, fam_hi, fam_lo = INCREASE_RELATIVE.unpack_from(view, PAYLOAD_OFFSET)
+    return Increase(snake_id, dx - 128, dy - 128, True, ((fam_hi << 16) | fam_lo) * FRACTION_24)
+
+
+def decode_leaderboard(view, size):
+    leaderboard_rank, player_rank, player_count = LEADERBOARD_HEADER.unpack_from(view, PAYLOAD_OFFSET)
+    entries = []
+    index = PAYLOAD_OFFSET + LEADERBOARD_HEADER.size
+    while index + LEADERBOARD_ENTRY.size <= size and len(entries) < 10:
+        sct, fam_hi, fam_lo, color, name_len = LEADERBOARD_ENTRY.unpack_from(view, index)
+        index += LEADERBOARD_ENTRY.size
+        name = _text(view, index, index + name_len).replace('\x00', '')
+        index += name_len
+        entries.append(LeaderboardEntry(sct, ((fam_hi << 16) | fam_lo) * FRACTION_24, color, name))
+    return Leaderboard(leaderboard_rank, player_rank, player_count, entries)
+
+
+def decode_dead(view, size):
+    if size > PAYLOAD_OFFSET:
+        return Dead(DEAD.unpack_from(view, PAYLOAD_OFFSET)[0])
+    return Dead(0)
+
+
+def decode_sector(view, size):
+    x, y = SECTOR.unpack_from(view, PAYLOAD_OFFSET)
+    return Sector(x, y)
+
+
+def decode_global_highscore(view, size):
+    sct_hi, sct_lo, fam_hi, fam_lo, name_len = GLOBAL_HIGHSCORE.unpack_from(view, PAYLOAD_OFFSET)
+    name_start = PAYLOAD_OFFSET + GLOBAL_HIGHSCORE.size
+    message_start = name_start + name_len
+    return GlobalHighscore((sct_hi << 16) | sct_lo, ((fam_hi << 16) | fam_lo) * FRACTION_24,
+                           _text(view, name_start, message_start), _text(view, message_start, size))
+
+
+def decode_pong(view, size):
+    return Pong()
+
+
+def decode_minimap(view, size):
+    return MinimapUpdate(view[PAYLOAD_OFFSET:size])
+
+
+def decode_snake_removed(view, size):
+    snake_id, status = SNAKE_REMOVED.unpack_from(view, PAYLOAD_OFFSET)
+    return SnakeRemoved(snake_id, status == 1)
+
+
+def decode_snake_added(view, size):
+    (snake_id, ehang_hi, ehang_lo, dir, wang_hi, wang_lo, speed, fam_hi, fam_lo, skin,
+     x_hi, x_lo, y_hi, y_lo, name_len) = SNAKE_ADDED.unpack_from(view, PAYLOAD_OFFSET)
+    name_start = PAYLOAD_OFFSET + SNAKE_ADDED.size
+    skin_len_index = name_start + name_len
+    if skin_len_index >= size:
+        raise struct.error(f"snake name runs past the end of a {size} byte 's' frame")
+    name = _text(view, name_start, skin_len_index)
+    custom_skin_len = view[skin_len_index]
+    body_start = skin_len_index + 1 + custom_skin_len
+    if body_start > size:
+        raise struct.error(f"custom skin runs past the end of a {size} byte 's' frame")
+    custom_skin = bytes(view[skin_len_index + 1:body_start]) if custom_skin_len > 0 else None
+    return SnakeAdded(snake_id, ((ehang_hi << 16) | ehang_lo) * ANGLE_24, dir - 48,
+                      ((wang_hi << 16) | wang_lo) * ANGLE_24, speed / 1000,
+                      ((fam_hi << 16) | fam_lo) * FRACTION_24, skin,
+                      ((x_hi << 16) | x_lo) / 5, ((y_hi << 16) | y_lo) / 5,
+                      name, custom_skin, decode_snake_body(view, body_start, size))
+
+
+def decode_snake_body(view, start, size):
+    """
+    Rebuild body parts (tail first, head last) as an (n, 2) float32 array.
+
+    The tail is absolute (int24 / 5) and every following part is a byte pair of
+    (value - 127) / 2 deltas.  The running sum is done in tenths as int32 so the
+    result is exact.
+    """
+    count = (size - start - 6) // 2
+    if count < 0:
+        return np.empty((0, 2), dtype=np.float32)
+    tail = np.frombuffer(view, dtype=np.uint8, count=6, offset=start).astype(np.int32).reshape(2, 3)
+    tenths = np.empty((count + 1, 2), dtype=np.int32)
+    tenths[0] = ((tail[:, 0] << 16) | (tail[:, 1] << 8) | tail[:, 2]) * 2
+    deltas = np.frombuffer(view, dtype=np.uint8, count=count * 2, offset=start + 6).reshape(count, 2)
+    np.multiply(deltas, 5, out=tenths[1:], dtype=np.int32)
+    tenths[1:] -= 127 * 5
+    np.cumsum(tenths, axis=0, out=tenths)
+    return tenths.astype(np.float32) / np.float32(10)
+
+
+def decode_food(view, size):
+    # A read-only view over the frame; sizes are still raw (value * 5)
+    count = (size - PAYLOAD_OFFSET) // FOOD_DTYPE.itemsize
+    return FoodBatch(np.frombuffer(view, dtype=FOOD_DTYPE, count=count, offset=PAYLOAD_OFFSET))
+
+
+def decode_food_eaten(view, size):
+    return FoodEaten(*FOOD_EATEN.unpack_from(view, PAYLOAD_OFFSET))
+
+
+def decode_food_eaten_no_eater(view, size):
+    x, y = FOOD_EATEN_NO_EATER.unpack_from(view, PAYLOAD_OFFSET)
+    return FoodEaten(x, y, None)
+
+
+def _prey_update(prey_id, x, y, dir, ang, wang, sp):
+    return PreyUpdate(prey_id, x * 3 + 1, y * 3 + 1, dir, ang, wang, sp)
+
+
+def decode_prey_update_sp(view, size):
+    prey_id, x, y, sp = PREY_UPDATE_SP.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, None, None, None, sp / 1000)
+
+
+def decode_prey_update_ang(view, size):
+    prey_id, x, y, ang_hi, ang_lo = PREY_UPDATE_ANG.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, None, ((ang_hi << 16) | ang_lo) * ANGLE_24, None, None)
+
+
+def decode_prey_update_dir_wang(view, size):
+    prey_id, x, y, dir, wang_hi, wang_lo = PREY_UPDATE_DIR_WANG.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, dir - 48, None, ((wang_hi << 16) | wang_lo) * ANGLE_24, None)
+
+
+def decode_prey_update_ang_sp(view, size):
+    prey_id, x, y, ang_hi, ang_lo, sp = PREY_UPDATE_ANG_SP.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, None, ((ang_hi << 16) | ang_lo) * ANGLE_24, None, sp / 1000)
+
+
+def decode_prey_update_dir_wang_sp(view, size):
+    prey_id, x, y, dir, wang_hi, wang_lo, sp = PREY_UPDATE_DIR_WANG_SP.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, dir - 48, None, ((wang_hi << 16) | wang_lo) * ANGLE_24, sp / 1000)
+
+
+def decode_prey_update_dir_ang_wang(view, size):
+    prey_id, x, y, dir, ang_hi, ang_lo, wang_hi, wang_lo = PREY_UPDATE_DIR_ANG_WANG.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, dir - 48, ((ang_hi << 16) | ang_lo) * ANGLE_24,
+                        ((wang_hi << 16) | wang_lo) * ANGLE_24, None)
+
+
+def decode_prey_update_dir_ang_wang_sp(view, size):
+    (prey_id, x, y, dir, ang_hi, ang_lo, wang_hi, wang_lo,
+     sp) = PREY_UPDATE_DIR_ANG_WANG_SP.unpack_from(view, PAYLOAD_OFFSET)
+    return _prey_update(prey_id, x, y, dir - 48, ((ang_hi << 16) | ang_lo) * ANGLE_24,
+                        ((wang_hi << 16) | wang_lo) * ANGLE_24, sp / 1000)
+
+
+def decode_prey_added(view, size):
+    (prey_id, color, x_hi, x_lo, y_hi, y_lo, prey_size, dir, wang_hi, wang_lo,
+     ang_hi, ang_lo, speed) = PREY_ADDED.unpack_from(view, PAYLOAD_OFFSET)
+    return PreyAdded(prey_id, color, ((x_hi << 16) | x_lo) / 5, ((y_hi << 16) | y_lo) / 5, prey_size / 5,
+                     dir - 48, ((wang_hi << 16) | wang_lo) * ANGLE_24, ((ang_hi << 16) | ang_lo) * ANGLE_24,
+                     speed / 1000)
+
+
+def decode_prey_eaten(view, size):
+    return PreyRemoved(*PREY_EATEN.unpack_from(view, PAYLOAD_OFFSET))
+
+
+def decode_prey_removed(view, size):
+    prey_id, = SNAKE_ID.unpack_from(view, PAYLOAD_OFFSET)
+    return PreyRemoved(prey_id, None)
+
+
+def decode_verify_code(view, size):
+    return VerifyCode(view[PAYLOAD_OFFSET:size])
+
+
+def decode_kill(view, size):
+    killer_snake_id, kills_hi, kills_lo = KILL.unpack_from(view, PAYLOAD_OFFSET)
+    return Kill(killer_snake_id, (kills_hi << 16) | kills_lo)
+
+
+def decode_secret(secret):
+    """Answer to the pre-init riddle: 24 bytes derived from frame bytes 17..64."""
+    result = [0] * 24
+    global_value = 0
+    for i in range(24):
+        value1 = secret[17 + i * 2]
+        if value1 <= 96:
+            value1 += 32
+        value1 = (value1 - 98 - i * 34) % 26
+        if value1 < 0:
+            value1 += 26
+
+        value2 = secret[18 + i * 2]
+        if value2 <= 96:
+            value2 += 32
+        value2 = (value2 - 115 - i * 34) % 26
+        if value2 < 0:
+            value2 += 26
+
+        interim_result = (value1 << 4) | value2
+        offset = 97 if interim_result >= 97 else 65
+        interim_result -= offset
+        if i == 0:
+            global_value = 2 + interim_result
+        result[i] = (interim_result + global_value) % 26 + offset
+        global_value += 3 + interim_result
+
+    return result
+
+
+# Decoders by message type.  Types whose layout depends on the payload length
+# list their variants here; a length without a variant uses DECODERS.
+_DECODERS = {
+    '6': decode_pre_init,
+    'a': decode_initial_setup,
+    'e': decode_unexpected_length,
+    'E': decode_unexpected_length,
+    '3': decode_unexpected_length,
+    '4': decode_unexpected_length,
+    '5': decode_unexpected_length,
+    'h': decode_fullness,
+    'r': decode_remove_part,
+    'g': decode_move_absolute,
+    'G': decode_move_relative,
+    'n': decode_increase_absolute,
+    'N': decode_increase_relative,
+    'l': decode_leaderboard,
+    'v': decode_dead,
+    'W': decode_sector,
+    'w': decode_sector,
+    'm': decode_global_highscore,
+    'p': decode_pong,
+    'u': decode_minimap,
+    's': decode_snake_added,
+    'F': decode_food,
+    'b': decode_food,
+    'f': decode_food,
+    'c': decode_food_eaten,
+    'j': decode_unexpected_length,
+    'y': decode_prey_added,
+    'o': decode_verify_code,
+    'k': decode_kill,
+}
+
+_LENGTH_VARIANTS = {
+    'e': {5: decode_rotation_e5, 4: decode_rotation_e4, 3: decode_rotation_e3},
+    'E': {4: decode_rotation_E4, 3: decode_rotation_E3},
+    '3': {4: decode_rotation_34, 3: decode_rotation_33},
+    '4': {5: decode_rotation_45, 4: decode_rotation_44, 3: decode_rotation_clockwise_wang},
+    '5': {4: decode_rotation_54, 3: decode_rotation_clockwise_wang},
+    'r': {2: decode_remove_part_only},
+    's': {3: decode_snake_removed},
+    'c': {4: decode_food_eaten_no_eater},
+    'j': {
+        8: decode_prey_update_sp,
+        9: decode_prey_update_ang,
+        10: decode_prey_update_dir_wang,
+        11: decode_prey_update_ang_sp,
+        12: decode_prey_update_dir_wang_sp,
+        13: decode_prey_update_dir_ang_wang,
+        15: decode_prey_update_dir_ang_wang_sp,
+    },
+    'y': {2: decode_prey_removed, 4: decode_prey_eaten},
+}
+
+# 256-entry tables indexed by the raw type byte
+DECODERS = [None] * 256
+LENGTH_VARIANTS = [None] * 256
+for _msg_type, _decoder in _DECODERS.items():
+    DECODERS[ord(_msg_type)] = _decoder
+for _msg_type, _variants in _LENGTH_VARIANTS.items():
+    LENGTH_VARIANTS[ord(_msg_type)] = _variants
+del _msg_type, _decoder, _variants
+
+
+def decode_message(message):
+    """
+    Decode one clientbound frame into (message type byte, record).
+
+    The record is None for message types this decoder does not know.
+    Malformed frames raise struct.error.
+    """
+    view = memoryview(message)
+    size = len(view)
+    msg_byte = view[2]
+    variants = LENGTH_VARIANTS[msg_byte]
+    if variants is None:
+        decoder = DECODERS[msg_byte]
+        if decoder is None:
+            return msg_byte, None
+    else:
+        decoder = variants.get(size - PAYLOAD_OFFSET) or DECODERS[msg_byte]
+    return msg_byte, decoder(view, size)
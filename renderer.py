@@ -0,0 +1,364 @@
+"""
+Pygame window, input handling and drawing for a SlitherClient.
+
+Only this module and the modules it imports use pygame, so a headless
+client never imports it.
+"""
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+import pygame
+from pygame.locals import *
+
+from background import FramePresenter, TiledBackground
+from food_atlas import FoodAtlas
+from lod import LodSettings, decimate, food_density_surface
+from scheduler import FrameScheduler
+from text_cache import TextCache
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_IMAGE = 'assets/bg54.jpg'
+
+FOOD_COLORS = [
+    (255, 0, 0),    # Red
+    (0, 255, 0),    # Green
+    (0, 0, 255),    # Blue
+    (255, 255, 0),  # Yellow
+    (255, 0, 255),  # Magenta
+    (0, 255, 255),  # Cyan
+    (255, 165, 0),  # Orange
+    (128, 0, 128),  # Purple
+    (255, 255, 255) # White
+]
+SNAKE_COLORS = [
+    (255, 0, 0),    # Red
+    (0, 255, 0),    # Green
+    (0, 0, 255),    # Blue
+    (255, 255, 0),  # Yellow
+    (255, 0, 255),  # Magenta
+    (0, 255, 255),  # Cyan
+    (255, 165, 0),  # Orange
+    (128, 0, 128),  # Purple
+    (255, 255, 255), # White
+    (139, 0, 0),    # Dark Red
+    (0, 139, 0),    # Dark Green
+    (0, 0, 139),    # Dark Blue
+    (139, 139, 0),  # Dark Yellow
+    (139, 0, 139),  # Dark Magenta
+    (0, 139, 139),  # Dark Cyan
+    (255, 69, 0),   # Orange Red
+    (128, 128, 0),  # Olive
+    (128, 0, 0),    # Maroon
+    (0, 128, 0),    # Green
+    (0, 0, 128),    # Navy
+    (128, 128, 128),# Gray
+    (255, 215, 0),  # Gold
+    (255, 140, 0),  # Dark Orange
+    (255, 165, 79), # Lemon Chiffon
+    (255, 182, 193),# Light Pink
+    (255, 20, 147), # Deep Pink
+    (255, 105, 180),# Hot Pink
+    (255, 69, 0),   # Tomato
+    (255, 160, 122),# Light Coral
+    (255, 99, 71),  # Dark Salmon
+    (255, 127, 80), # Coral
+    (255, 228, 196),# Bisque
+    (255, 235, 205),# Blanched Almond
+    (255, 245, 238),# Wheat
+    (255, 248, 220),# Cornsilk
+    (255, 250, 205),# Lemon Chiffon
+    (255, 255, 224),# Light Yellow
+    (255, 255, 240),# Ivory
+    (240, 255, 240),# Honeydew
+    (240, 255, 255),# Azure
+    (245, 245, 245),# White Smoke
+    (245, 255, 250),# Mint Cream
+    (248, 248, 255),# Ghost White
+    (250, 235, 215),# Antique White
+    (250, 240, 230),# Linen
+    (253, 245, 230),# Old Lace
+    (255, 228, 181),# Moccasin
+    (255, 228, 196),# Bisque
+    (255, 228, 225),# Misty Rose
+    (255, 239, 213),# Papaya Whip
+    (255, 239, 219),# Blanched Almond
+    (255, 240, 245),# Lavender Blush
+    (255, 248, 220),# Cornsilk
+    (255, 250, 205),# Lemon Chiffon
+    (255, 250, 240),# Floral White
+    (255, 255, 240),# Ivory
+    (255, 255, 255) # White
+]
+
+
+class Renderer:
+    """
+    Draws world snapshots and turns mouse input into client packets.
+
+    The renderer runs on its own thread and only reads the snapshots the
+    network side publishes, so a slow frame never delays packet handling.
+    Packets it sends are handed to the client's event loop thread-safely.
+    Nothing touches the display until the thread starts: open() initializes
+    pygame and loads the assets then.
+    """
+
+    def __init__(self, client, screen_size, dirty_rects=False, food_glow=False, lod=None, fps=60, epoch=None):
+        self.client = client
+        self.snapshots = client.snapshots
+        self.screen_width, self.screen_height = screen_size
+        self.screen_center = np.array((self.screen_width / 2, self.screen_height / 2))
+        self.dirty_rects = dirty_rects
+        self.food_glow = food_glow
+        # Zoom thresholds for the cheaper zoomed-out drawing paths
+        self.lod = lod or LodSettings()
+        # Frames missed by a whole period are skipped; input is still polled
+        self.scheduler = FrameScheduler(fps, epoch)
+        self.loop = None
+        self.thread = None
+        self.running = False
+        self.screen = None
+        self.background = None
+        self.presenter = None
+        self.food_atlas = None
+        # Rendered names, leaderboard and overlay text, reused across frames
+        self.text_cache = None
+        # The snapshot being drawn
+        self.snapshot = None
+
+    def open(self):
+        if self.screen is not None:
+            return
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+        pygame.display.set_caption('Slither.io Client')
+        # The background needs the display mode set to convert to its format
+        self.background = TiledBackground(pygame.image.load(BACKGROUND_IMAGE), (self.screen_width, self.screen_height))
+        self.presenter = FramePresenter(self.background, self.dirty_rects)
+        self.food_atlas = FoodAtlas(FOOD_COLORS, glow=self.food_glow)
+        self.text_cache = TextCache()
+
+    def start(self, loop):
+        """Start the render thread; `loop` is the client's event loop."""
+        if self.thread is not None:
+            return
+        self.loop = loop
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='renderer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def run(self):
+        try:
+            self.open()
+            scheduler = self.scheduler
+            while self.running:
+                render = scheduler.begin_frame()
+                self.handle_input()
+                if not self.running:
+                    break
+                if render:
+                    self.draw_frame()
+                scheduler.sleep()
+        except pygame.error as e:
+            logger.error(f"Pygame error in render thread: {e}")
+        finally:
+            pygame.quit()
+
+    def call_client(self, method, *args):
+        # Packets are sent from the event loop thread
+        self.loop.call_soon_threadsafe(method, *args)
+
+    def handle_input(self):
+        client = self.client
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                client.alive = False
+                self.running = False
+                return
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 4:  # Mouse wheel up
+                    client.zoom *= 1.1
+                elif event.button == 5:  # Mouse wheel down
+                    client.zoom /= 1.1
+                elif event.button == 1:  # Left mouse button
+                    self.call_client(client.set_boosting, True)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:  # Left mouse button
+                    self.call_client(client.set_boosting, False)
+
+        if pygame.mouse.get_focused():
+            current_time = time.time()
+            if current_time - client.last_rotation_time >= client.rotation_interval:
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                snake_head_screen_x, snake_head_screen_y = self.screen_width // 2, self.screen_height // 2
+                delta_x = mouse_x - snake_head_screen_x
+                delta_y = mouse_y - snake_head_screen_y
+                angle = math.atan2(delta_y, delta_x)
+                byte1 = int(angle * 256 / (2 * math.pi)) & 0xFF
+                byte2 = (client.speed_multiplier << 5) & 0xE0
+                self.call_client(client.send_rotation, byte1, byte2)
+                logger.debug("Calculated angle: %s, byte1: %s, byte2: %s", angle, byte1, byte2)
+                client.last_rotation_time = current_time
+
+    def draw_frame(self):
+        self.open()
+        with self.snapshots.read() as snapshot:
+            self.snapshot = snapshot
+            self.draw_background()
+            self.draw_elements()
+            self.draw_leaderboard()
+            self.draw_debug_info()
+            if not snapshot.alive:
+                self.draw_you_died()
+            self.snapshot = None
+        self.presenter.present()
+
+    def world_to_screen(self, points):
+        """Transform an (n, 2) array of world points with the snapshot's camera."""
+        snapshot = self.snapshot
+        camera = np.array((snapshot.camera_x, snapshot.camera_y))
+        return ((points - camera) * snapshot.zoom + self.screen_center).astype(np.int32)
+
+    def draw_background(self):
+        # One blit of the pre-tiled background, or only the dirty regions
+        self.presenter.begin(self.screen, self.snapshot.camera_x, self.snapshot.camera_y)
+
+    def draw_you_died(self):
+        text_surface = self.text_cache.render("You Died!", (255, 0, 0), 72)
+        text_rect = text_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 4))
+        self.presenter.mark(self.screen.blit(text_surface, text_rect))
+
+    def calculate_thickness(self, fam):
+        base_thickness = 5  # Base thickness
+        max_thickness = 20  # Maximum thickness
+        return base_thickness + (max_thickness - base_thickness) * fam
+
+    def draw_snake(self, points, fam, name, color):
+        if not len(points):
+            return
+
+        mark = self.presenter.mark
+        zoom = self.snapshot.zoom
+        thickness = self.calculate_thickness(fam)
+
+        # Whole body to screen space at once, drawn as a single polyline
+        screen_points = self.world_to_screen(points)
+        if zoom < self.lod.simplify_below_zoom:
+            screen_points = decimate(screen_points, self.lod.min_segment_px)
+        screen_points = screen_points.tolist()
+        if len(screen_points) > 1:
+            mark(pygame.draw.lines(self.screen, color, False, screen_points, max(1, int(thickness * zoom))))
+
+        # Draw the head of the snake as a slightly larger circle
+        screen_head_x, screen_head_y = screen_points[-1]
+        mark(pygame.draw.circle(self.screen, color, (screen_head_x, screen_head_y), max(1, int((thickness + 2) * zoom))))
+
+        if zoom < self.lod.names_min_zoom:
+            return
+
+        # Draw the snake's name above the head
+        name = (name or '').strip()
+        if not name:
+            name = "(No Name)"
+        # White name with a small black outline for readability
+        name_surface = self.text_cache.render(name, (255, 255, 255), 24, outline=(0, 0, 0))
+        mark(self.screen.blit(name_surface, name_surface.get_rect(center=(screen_head_x, screen_head_y - 20))))
+
+    def draw_elements(self):
+        """
+        Draw all game elements in the snapshot.
+        """
+        snapshot = self.snapshot
+
+        # Draw snakes whose body box overlapped the screen
+        for points, fam, skin, name in zip(snapshot.snake_points, snapshot.snake_fam.tolist(),
+                                           snapshot.snake_skin.tolist(), snapshot.snake_names):
+            self.draw_snake(points, fam, name, SNAKE_COLORS[skin % len(SNAKE_COLORS)])
+
+        # Draw food
+        self.draw_foods(snapshot.food_x, snapshot.food_y, snapshot.food_color, snapshot.food_size)
+
+        # Draw prey
+        if snapshot.zoom < self.lod.prey_points_below_zoom:
+            self.draw_prey_points(np.column_stack((snapshot.prey_x, snapshot.prey_y)))
+            return
+        for x, y, size in zip(snapshot.prey_x.tolist(), snapshot.prey_y.tolist(), snapshot.prey_size.tolist()):
+            self.draw_prey(x, y, size)
+
+    def draw_foods(self, xs, ys, colors, sizes):
+        # One blits call from pre-rendered sprites for every visible food
+        if not len(xs):
+            return
+        zoom = self.snapshot.zoom
+        screen_points = self.world_to_screen(np.column_stack((xs, ys)))
+        if zoom < self.lod.food_tiles_below_zoom:
+            density = food_density_surface(screen_points, sizes, (self.screen_width, self.screen_height), self.lod)
+            self.presenter.mark(self.screen.blit(density, (0, 0)))
+            return
+        radii = np.maximum((sizes * zoom).astype(np.int64), 1)
+        keys = self.food_atlas.keys(colors, radii)
+        self.presenter.mark_all(self.screen.blits(self.food_atlas.blit_sequence(keys, screen_points)))
+
+    def draw_prey(self, x, y, size):
+        (screen_x, screen_y), = self.world_to_screen(np.array(((x, y),))).tolist()
+        self.presenter.mark(pygame.draw.circle(self.screen, (0, 0, 255), (screen_x, screen_y), max(1, int(size * self.snapshot.zoom))))
+
+    def draw_prey_points(self, points):
+        fill = self.screen.fill
+        mark = self.presenter.mark
+        for screen_x, screen_y in self.world_to_screen(points).tolist():
+            mark(fill((0, 0, 255), (screen_x, screen_y, 1, 1)))
+
+    def draw_debug_info(self):
+        snapshot = self.snapshot
+        timing = self.scheduler.report()
+        debug_info = [
+            f"FPS: {timing['fps']:.0f} (jitter {timing['jitter_ms']:.1f} ms, skipped {timing['skipped']})",
+            f"Camera: ({snapshot.camera_x:.2f}, {snapshot.camera_y:.2f})",
+            f"Zoom: {snapshot.zoom:.2f}",
+            f"Player Snake: {snapshot.player_present}",
+            f"Snakes: {snapshot.snake_count}",
+            f"Foods: {snapshot.food_count}",
+            f"Preys: {snapshot.prey_count}",
+        ]
+        latency = snapshot.latency
+        if latency is not None:
+            debug_info.insert(1, f"RTT: {latency['srtt_ms']:.0f} ms (p95 {latency['rtt_p95_ms']:.0f}), "
+                                 f"jitter {latency['jitter_ms']:.1f} ms, late {latency['lateness_ms']:.0f} ms")
+        y = self.screen_height - 24 * len(debug_info) - 10
+        # FPS, camera and counters change every frame, so they would only churn the cache
+        for info in debug_info:
+            surface = self.text_cache.render_uncached(info, (255, 255, 255), 24)
+            self.presenter.mark(self.screen.blit(surface, (10, y)))
+            y += 24
+
+    def draw_leaderboard(self):
+        snapshot = self.snapshot
+        x = 10
+        y = 10  # Start position for the first player
+        spacing = 30  # Spacing between each player
+
+        # Display player rank
+        player_rank_text = f"Your rank: {snapshot.player_rank}/{snapshot.player_count}"
+        surface_rank = self.text_cache.render(player_rank_text, (255, 255, 255), 24)
+        self.presenter.mark(self.screen.blit(surface_rank, (x, y)))
+        y += spacing
+
+        # Display top 10 players
+        for i, player in enumerate(snapshot.leaderboard[:10], 1):
+            username = player['username'].replace('\x00', '')  # Remove null characters
+            score = player['score']  # Use the pre-calculated score
+            text = f"{i}. {username}: {score}"
+            color = SNAKE_COLORS[player['color'] % len(SNAKE_COLORS)]
+            surface = self.text_cache.render(text, color, 24)
+            self.presenter.mark(self.screen.blit(surface, (x, y)))
+            y += spacing  # Move to the next vertical position
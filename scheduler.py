@@ -0,0 +1,67 @@
+"""
+Deadline-based frame pacing for the game and render loops.
+"""
+import asyncio
+import statistics
+import time
+from collections import deque
+
+
+class FrameScheduler:
+    """
+    Paces a loop against absolute deadlines epoch + n * period.
+
+    Work time does not stretch the period: delay() is measured to the next
+    deadline, not from the end of the work.  Loops built with the same epoch
+    and fps stay in phase.  begin_frame() returns False when a whole period
+    was missed, so a render loop can skip drawing and catch up while input
+    and network work still run every iteration.
+    """
+
+    def __init__(self, fps=60, epoch=None, window=120):
+        self.period = 1 / fps
+        self.epoch = time.perf_counter() if epoch is None else epoch
+        self.frame = 0
+        # Start time and whether it rendered, for the last `window` iterations
+        self.history = deque(maxlen=window)
+        self.rendered = 0
+        self.skipped = 0
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        due = int((now - self.epoch) / self.period)
+        render = due <= self.frame
+        # Never schedule a deadline that has already passed
+        self.frame = max(self.frame, due) + 1
+        self.history.append((now, render))
+        if render:
+            self.rendered += 1
+        else:
+            self.skipped += 1
+        return render
+
+    def delay(self):
+        return max(0.0, self.epoch + self.frame * self.period - time.perf_counter())
+
+    def sleep(self):
+        time.sleep(self.delay())
+
+    async def sleep_async(self):
+        await asyncio.sleep(self.delay())
+
+    def report(self):
+        """Achieved FPS, mean iteration time and jitter (ms) over the recent window."""
+        history = self.history
+        if len(history) < 2:
+            return {'fps': 0.0, 'frame_ms': 0.0, 'jitter_ms': 0.0, 'rendered': self.rendered, 'skipped': self.skipped}
+        starts = [start for start, _ in history]
+        span = starts[-1] - starts[0]
+        intervals = [(later - earlier) * 1000 for earlier, later in zip(starts, starts[1:])]
+        rendered = sum(1 for _, render in list(history)[1:] if render)
+        return {
+            'fps': rendered / span if span > 0 else 0.0,
+            'frame_ms': statistics.fmean(intervals),
+            'jitter_ms': statistics.pstdev(intervals),
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+        }
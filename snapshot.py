@@ -0,0 +1,135 @@
+"""
+Read-only world snapshots handed from the network side to the renderer.
+"""
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class WorldSnapshot:
+    """
+    Everything one frame draws, copied out of the client's stores.
+
+    Only entities inside the visible range are copied.  Snake bodies are
+    copies of their ring buffer contents, so the snapshot stays valid while
+    packet handlers keep moving the live snakes.
+    """
+
+    def __init__(self):
+        self.tick = 0
+        self.camera_x = 0.0
+        self.camera_y = 0.0
+        self.zoom = 1.0
+        self.alive = False
+        self.snake_points = []
+        self.snake_fam = np.empty(0, dtype=np.float32)
+        self.snake_skin = np.empty(0, dtype=np.uint8)
+        self.snake_names = []
+        self.food_x = self.food_y = self.food_color = self.food_size = np.empty(0)
+        self.prey_x = self.prey_y = self.prey_size = np.empty(0, dtype=np.float32)
+        self.leaderboard = []
+        self.player_rank = 0
+        self.player_count = 0
+        self.player_present = False
+        self.snake_count = 0
+        self.food_count = 0
+        self.prey_count = 0
+        self.latency = None
+
+    def capture(self, client, tick):
+        self.tick = tick
+        self.camera_x = client.camera_x
+        self.camera_y = client.camera_y
+        self.zoom = client.zoom
+        self.alive = client.alive
+        visible_range = client.get_visible_range()
+
+        snakes = client.snakes
+        slots = snakes.query_rect(*visible_range)
+        # Bodies end at the predicted head so snakes move smoothly between packets
+        heads = client.predictor.heads(snakes, slots).astype(np.float32)
+        self.snake_points = [np.concatenate((snakes.body[slot].points(), head[np.newaxis]))
+                             for slot, head in zip(slots.tolist(), heads)]
+        self.snake_fam = snakes.fam[slots]
+        self.snake_skin = snakes.skin[slots]
+        self.snake_names = [snakes.name[slot] for slot in slots.tolist()]
+
+        self.food_x, self.food_y, self.food_color, self.food_size = client.foods.columns_in_rect(*visible_range)
+
+        preys = client.preys
+        slots = preys.query_rect(*visible_range)
+        self.prey_x = preys.x[slots]
+        self.prey_y = preys.y[slots]
+        self.prey_size = preys.size[slots]
+
+        self.leaderboard = list(client.leaderboard)
+        self.player_rank = client.player_rank
+        self.player_count = client.player_count
+        self.player_present = client.player_slot() >= 0
+        self.snake_count = len(snakes)
+        self.food_count = len(client.foods)
+        self.prey_count = len(preys)
+        self.latency = client.latency.report()
+
+
+class SnapshotBuffer:
+    """
+    Double buffer of WorldSnapshots between one writer and one reader thread.
+
+    The writer fills the back snapshot between begin_write() and publish().
+    The front/back swap happens at publish unless the reader is still drawing
+    the front; then it is deferred to the reader's release().  Neither side
+    ever waits for the other to finish its work, only for the swap itself.
+    """
+
+    def __init__(self):
+        self.front = WorldSnapshot()
+        self.back = WorldSnapshot()
+        self.lock = threading.Lock()
+        self.reading = False
+        self.writing = False
+        self.pending = False
+        self.published = 0
+
+    def begin_write(self):
+        with self.lock:
+            self.writing = True
+            return self.back
+
+    def publish(self):
+        with self.lock:
+            self.writing = False
+            self.published += 1
+            if self.reading:
+                self.pending = True
+            else:
+                self._swap()
+
+    def capture(self, client):
+        """Fill the back snapshot from the client and publish it."""
+        self.begin_write().capture(client, self.published + 1)
+        self.publish()
+
+    def acquire(self):
+        with self.lock:
+            self.reading = True
+            return self.front
+
+    def release(self):
+        with self.lock:
+            self.reading = False
+            if self.pending and not self.writing:
+                self._swap()
+
+    def _swap(self):
+        self.front, self.back = self.back, self.front
+        self.pending = False
+
+    @contextmanager
+    def read(self):
+        snapshot = self.acquire()
+        try:
+            yield snapshot
+        finally:
+            self.release()
@@ -0,0 +1,100 @@
+"""
+Uniform-grid spatial index for viewport culling and neighbour queries.
+"""
+import numpy as np
+
+
+class GridIndex:
+    """
+    Maps store slots to the grid cells their bounding box overlaps.
+
+    Entries are points or boxes in world coordinates.  Updating an entry only
+    touches the cell sets when its cell range actually changes, so packet
+    handlers can call update() on every move.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.ranges = {}
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return (max(int(left // size), 0), max(int(top // size), 0),
+                max(int(right // size), 0), max(int(bottom // size), 0))
+
+    def update(self, slot, left, top, right, bottom):
+        new_range = self.cell_range(left, top, right, bottom)
+        old_range = self.ranges.get(slot)
+        if new_range == old_range:
+            return
+        if old_range is not None:
+            self._unlink(slot, old_range)
+        self.ranges[slot] = new_range
+        cx0, cy0, cx1, cy1 = new_range
+        cells = self.cells
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                key = (cy << 16) | cx
+                members = cells.get(key)
+                if members is None:
+                    cells[key] = {slot}
+                else:
+                    members.add(slot)
+
+    def remove(self, slot):
+        old_range = self.ranges.pop(slot, None)
+        if old_range is not None:
+            self._unlink(slot, old_range)
+
+    def _unlink(self, slot, cell_range):
+        cx0, cy0, cx1, cy1 = cell_range
+        cells = self.cells
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                key = (cy << 16) | cx
+                members = cells[key]
+                members.discard(slot)
+                if not members:
+                    del cells[key]
+
+    def query(self, left, top, right, bottom):
+        """
+        Return candidate slots whose cells overlap the rectangle.
+
+        Callers filter the candidates exactly against their own bounds.
+        """
+        cx0, cy0, cx1, cy1 = self.cell_range(left, top, right, bottom)
+        # A huge window would visit more cells than there are entries; list them all instead
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            return np.fromiter(self.ranges, dtype=np.intp, count=len(self.ranges))
+        found = set()
+        cells = self.cells
+        for cy in range(cy0, cy1 + 1):
+            row = cy << 16
+            for cx in range(cx0, cx1 + 1):
+                members = cells.get(row | cx)
+                if members:
+                    found.update(members)
+        return np.fromiter(found, dtype=np.intp, count=len(found))
+
+
+def nearest_in_window(query, x, y, k, radius, max_radius):
+    """
+    Find the k nearest entries to (x, y) with a growing square window.
+
+    `query(left, top, right, bottom)` returns (ids, distances) for the entries
+    inside the window.  The window doubles until the k-th distance fits inside
+    it (so nothing outside could be closer) or it reaches max_radius.
+    Returns (ids, distances) sorted by distance.
+    """
+    while True:
+        ids, distances = query(x - radius, y - radius, x + radius, y + radius)
+        enough = len(distances) >= k
+        if (enough and np.partition(distances, k - 1)[k - 1] <= radius) or radius >= max_radius:
+            order = np.argsort(distances, kind='stable')[:k]
+            return ids[order], distances[order]
+        radius *= 2
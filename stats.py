@@ -0,0 +1,146 @@
+"""
+Per-message-type throughput and latency statistics for the packet path.
+"""
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency histograms split every power of two of nanoseconds into 4 sub-buckets
+SUB_BUCKET_BITS = 2
+BUCKET_COUNT = 65 << SUB_BUCKET_BITS
+
+
+def bucket_index(ns):
+    bits = ns.bit_length()
+    if bits <= SUB_BUCKET_BITS:
+        return ns
+    return (bits << SUB_BUCKET_BITS) | ((ns >> (bits - SUB_BUCKET_BITS - 1)) & ((1 << SUB_BUCKET_BITS) - 1))
+
+
+def bucket_upper_bound(index):
+    bits = index >> SUB_BUCKET_BITS
+    if bits <= SUB_BUCKET_BITS:
+        return index
+    sub = index & ((1 << SUB_BUCKET_BITS) - 1)
+    # Leading bit plus the sub-bucket bits, then everything below set
+    return (((1 << SUB_BUCKET_BITS) | sub) + 1 << (bits - SUB_BUCKET_BITS - 1)) - 1
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.buckets[bucket_index(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        buckets = self.buckets
+        for index, hits in enumerate(other.buckets):
+            if hits:
+                buckets[index] += hits
+        self.count += other.count
+        self.total_ns += other.total_ns
+        if other.max_ns > self.max_ns:
+            self.max_ns = other.max_ns
+
+    def percentile(self, q):
+        """Return an upper bound in ns for the q-th percentile (0-100)."""
+        if not self.count:
+            return 0
+        target = self.count * q / 100
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return min(bucket_upper_bound(index), self.max_ns)
+        return self.max_ns
+
+
+class TypeStats:
+    __slots__ = ('count', 'bytes', 'decode', 'handle')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.decode = Histogram()
+        self.handle = Histogram()
+
+
+class PacketStats:
+    """
+    Counts, byte totals and decode/handler time histograms per message type.
+
+    The client only calls record() when stats are enabled, so a disabled
+    client pays a single None check per frame.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.started = time.time()
+
+    def record(self, msg_type, size, decode_ns, handle_ns):
+        stats = self.types.get(msg_type)
+        if stats is None:
+            stats = self.types[msg_type] = TypeStats()
+        stats.count += 1
+        stats.bytes += size
+        stats.decode.record(decode_ns)
+        stats.handle.record(handle_ns)
+
+    def merge(self, other):
+        """Add another client's counts and histograms into this one."""
+        for msg_type, other_stats in other.types.items():
+            stats = self.types.get(msg_type)
+            if stats is None:
+                stats = self.types[msg_type] = TypeStats()
+            stats.count += other_stats.count
+            stats.bytes += other_stats.bytes
+            stats.decode.merge(other_stats.decode)
+            stats.handle.merge(other_stats.handle)
+        self.started = min(self.started, other.started)
+
+    def reset(self):
+        self.types = {}
+        self.started = time.time()
+
+    def summary(self):
+        """Return a dict of per-type count, bytes, rates and p50/p99 times in microseconds."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        summary = {}
+        for msg_type, stats in sorted(self.types.items(), key=lambda item: -item[1].count):
+            summary[msg_type] = {
+                'count': stats.count,
+                'bytes': stats.bytes,
+                'per_second': stats.count / elapsed,
+                'bytes_per_second': stats.bytes / elapsed,
+                'decode_p50_us': stats.decode.percentile(50) / 1000,
+                'decode_p99_us': stats.decode.percentile(99) / 1000,
+                'handle_p50_us': stats.handle.percentile(50) / 1000,
+                'handle_p99_us': stats.handle.percentile(99) / 1000,
+                'handle_total_ms': stats.handle.total_ns / 1e6,
+            }
+        return summary
+
+    def dump(self, path):
+        with open(path, 'a') as f:
+            f.write(json.dumps({'time': time.time(), 'types': self.summary()}) + '\n')
+
+    async def dump_periodically(self, path, interval=10.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.dump(path)
+            except OSError as e:
+                logger.error(f"Error writing packet stats to {path}: {e}")
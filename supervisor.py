@@ -0,0 +1,199 @@
+"""
+Spread a large bot fleet over worker processes, one swarm event loop each.
+
+    python supervisor.py --sessions 3000 --workers 32 --server ws://host:port/slither
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+from logsink import setup_logging
+from stats import Histogram, PacketStats
+
+logger = logging.getLogger(__name__)
+
+
+def shard_sizes(sessions, workers):
+    """Split sessions as evenly as possible over workers."""
+    base, extra = divmod(sessions, workers)
+    return [base + (1 if index < extra else 0) for index in range(workers)]
+
+
+def run_worker(worker_id, sessions, swarm_options, metrics_queue, report_interval):
+    """Process entry point: run one respawning Swarm and stream its metrics."""
+    log_listener = setup_logging(level=logging.WARNING, log_dir=None)
+    try:
+        asyncio.run(_run_worker(worker_id, sessions, swarm_options, metrics_queue, report_interval))
+    finally:
+        log_listener.stop()
+
+
+async def _run_worker(worker_id, sessions, swarm_options, metrics_queue, report_interval):
+    from swarm import Swarm
+
+    options = dict(swarm_options, nickname_prefix=f"{swarm_options.get('nickname_prefix', 'Bot')}{worker_id}-")
+    swarm = Swarm(sessions, respawn=True, **options)
+    task = asyncio.create_task(swarm.run(report_interval=0))
+    while not task.done():
+        await asyncio.wait({task}, timeout=report_interval)
+        summary = swarm.summary()
+        del summary['types']
+        metrics_queue.put((worker_id, os.getpid(), summary, swarm.packet_stats(), swarm.rtt_histogram()))
+    task.result()
+
+
+class Supervisor:
+    """
+    Runs `sessions` clients over `workers` processes and keeps them running.
+
+    Each worker runs a Swarm with respawn on, so sessions lost to deaths or
+    disconnects are replaced inside their worker.  A worker process that
+    exits is restarted with the same shard after restart_delay.  Workers send
+    their swarm summary, merged PacketStats and RTT histogram every
+    report_interval; the supervisor keeps the latest per worker and merges
+    them into one view.
+    """
+
+    def __init__(self, sessions, workers=None, swarm_options=None, report_interval=5.0, restart_delay=1.0):
+        self.workers = max(1, min(workers or os.cpu_count() or 1, sessions or 1))
+        self.shards = shard_sizes(sessions, self.workers)
+        self.swarm_options = swarm_options or {}
+        self.report_interval = report_interval
+        self.restart_delay = restart_delay
+        self.metrics_queue = multiprocessing.Queue()
+        self.processes = [None] * self.workers
+        # time.time() after which an exited worker is relaunched, None while it runs
+        self.restart_at = [None] * self.workers
+        self.metrics = {}
+        self.packet_stats = {}
+        self.rtt_histograms = {}
+        self.restarts = 0
+        self.stopping = False
+        self.started = time.time()
+
+    def start_worker(self, worker_id):
+        process = multiprocessing.Process(
+            target=run_worker, name=f"swarm-worker-{worker_id}", daemon=True,
+            args=(worker_id, self.shards[worker_id], self.swarm_options, self.metrics_queue, self.report_interval))
+        process.start()
+        self.processes[worker_id] = process
+        self.restart_at[worker_id] = None
+        logger.info("Started worker %s (pid %s) with %s sessions", worker_id, process.pid, self.shards[worker_id])
+
+    def run(self, duration=None):
+        for worker_id in range(self.workers):
+            self.start_worker(worker_id)
+        last_report = time.time()
+        try:
+            while not self.stopping:
+                if duration is not None and time.time() - self.started >= duration:
+                    break
+                self.drain_metrics(timeout=0.5)
+                self.restart_exited()
+                if time.time() - last_report >= self.report_interval:
+                    logger.info("Supervisor: %s", json.dumps(self.summary()))
+                    last_report = time.time()
+        finally:
+            self.stop()
+        return self.summary()
+
+    def drain_metrics(self, timeout):
+        try:
+            message = self.metrics_queue.get(timeout=timeout)
+            while True:
+                worker_id, pid, summary, packet_stats, rtt_histogram = message
+                self.metrics[worker_id] = dict(summary, pid=pid)
+                self.packet_stats[worker_id] = packet_stats
+                self.rtt_histograms[worker_id] = rtt_histogram
+                message = self.metrics_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def restart_exited(self):
+        """Schedule exited workers for restart and relaunch those whose restart_delay is up."""
+        if self.stopping:
+            return
+        now = time.time()
+        for worker_id, process in enumerate(self.processes):
+            if process is None or process.is_alive():
+                continue
+            if self.restart_at[worker_id] is None:
+                logger.warning("Worker %s (pid %s) exited with %s; restarting in %.1fs",
+                               worker_id, process.pid, process.exitcode, self.restart_delay)
+                self.restart_at[worker_id] = now + self.restart_delay
+            elif now >= self.restart_at[worker_id]:
+                self.restarts += 1
+                self.start_worker(worker_id)
+
+    def stop(self):
+        self.stopping = True
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+
+    def summary(self):
+        """Totals across workers plus merged per-message-type packet stats."""
+        merged = PacketStats()
+        for packet_stats in self.packet_stats.values():
+            merged.merge(packet_stats)
+        rtt = Histogram()
+        for rtt_histogram in self.rtt_histograms.values():
+            rtt.merge(rtt_histogram)
+        totals = {}
+        for summary in self.metrics.values():
+            for key in ('running', 'alive', 'failed', 'finished', 'deaths', 'sessions', 'packets',
+                        'packets_per_second', 'bytes_per_second', 'bytes_sent'):
+                totals[key] = totals.get(key, 0) + summary.get(key, 0)
+        return {
+            'workers': self.workers,
+            'workers_alive': sum(1 for process in self.processes if process is not None and process.is_alive()),
+            'restarts': self.restarts,
+            'uptime': time.time() - self.started,
+            **totals,
+            'rtt_p50_ms': rtt.percentile(50) / 1e6,
+            'rtt_p95_ms': rtt.percentile(95) / 1e6,
+            'rtt_p99_ms': rtt.percentile(99) / 1e6,
+            'types': merged.summary(),
+            'per_worker': self.metrics,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run slither.io client swarms across worker processes.")
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--server', default=None)
+    parser.add_argument('--nickname-prefix', default="Bot")
+    parser.add_argument('--connect-interval', type=float, default=0.05)
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=None)
+    args = parser.parse_args()
+
+    swarm_options = {
+        'server_url': args.server,
+        'nickname_prefix': args.nickname_prefix,
+        'connect_interval': args.connect_interval,
+        'fps': args.fps,
+    }
+    supervisor = Supervisor(args.sessions, workers=args.workers, swarm_options=swarm_options,
+                            report_interval=args.report_interval)
+    summary = supervisor.run(args.duration)
+    logger.info("Supervisor finished: %s", json.dumps(summary))
+
+
+if __name__ == "__main__":
+    log_listener = setup_logging(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    try:
+        main()
+    finally:
+        log_listener.stop()
@@ -0,0 +1,183 @@
+"""
+Run many headless clients from one process on a single event loop.
+
+    python swarm.py --count 200 --server ws://host:port/slither
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import websockets
+
+from logsink import setup_logging
+from main import SlitherClient
+from stats import Histogram, PacketStats
+
+logger = logging.getLogger(__name__)
+
+
+class Swarm:
+    """
+    N headless SlitherClients sharing one event loop.
+
+    Clients connect one every connect_interval seconds so the server does not
+    see a burst of handshakes.  They all use protocol.py's module-level decoder
+    tables; per-client state is the world stores and a bound handler table.
+    A low fps keeps the per-client game loop (prediction, camera) cheap.
+
+    With respawn, a session that dies or disconnects is replaced by a new
+    client after respawn_delay, so the swarm keeps `count` sessions going.
+    """
+
+    def __init__(self, count, server_url=None, nickname_prefix="Bot", skins=None, connect_interval=0.05,
+                 fps=10, collect_stats=True, respawn=False, respawn_delay=1.0):
+        self.count = count
+        self.server_url = server_url
+        self.nickname_prefix = nickname_prefix
+        self.skins = skins
+        self.connect_interval = connect_interval
+        self.fps = fps
+        self.collect_stats = collect_stats
+        self.respawn = respawn
+        self.respawn_delay = respawn_delay
+        # Stats of replaced clients, so totals survive respawns
+        self.retired_stats = PacketStats()
+        self.retired_bytes_sent = 0
+        self.retired_rtt = Histogram()
+        # ws.close() tasks started by handle_death, awaited when run ends
+        self.closing = set()
+        self.clients = [self.make_client(index) for index in range(count)]
+        self.running = 0
+        self.failed = 0
+        self.finished = 0
+        self.deaths = 0
+        self.sessions = 0
+        self.started = time.time()
+
+    def make_client(self, index):
+        skin = self.skins[index % len(self.skins)] if self.skins else None
+        client = SlitherClient(headless=True, fps=self.fps, collect_stats=self.collect_stats, server_url=self.server_url,
+                               nickname=f"{self.nickname_prefix}{index}", skin=skin)
+        client.on_death = self.handle_death
+        return client
+
+    def handle_death(self, client):
+        self.deaths += 1
+        # Ending the session lets run_client start a replacement
+        if self.respawn and client.ws is not None:
+            task = asyncio.create_task(client.ws.close())
+            self.closing.add(task)
+            task.add_done_callback(self.closing.discard)
+
+    async def run_client(self, index):
+        await asyncio.sleep(index * self.connect_interval)
+        while True:
+            client = self.clients[index]
+            self.sessions += 1
+            self.running += 1
+            try:
+                await client.connect()
+                self.finished += 1
+            except (OSError, websockets.WebSocketException) as e:
+                self.failed += 1
+                logger.warning("Client %s failed to connect: %s", index, e)
+            finally:
+                self.running -= 1
+                client.alive = False
+            if not self.respawn:
+                return
+            if client.stats is not None:
+                self.retired_stats.merge(client.stats)
+            if client.writer is not None:
+                self.retired_bytes_sent += client.writer.bytes_sent
+            self.retired_rtt.merge(client.latency.rtt_histogram)
+            await asyncio.sleep(self.respawn_delay)
+            self.clients[index] = self.make_client(index)
+
+    async def run(self, report_interval=10.0):
+        reporter = asyncio.create_task(self.report_periodically(report_interval)) if report_interval else None
+        try:
+            await asyncio.gather(*(self.run_client(index) for index in range(self.count)))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            # Closes are bounded by the websocket close_timeout
+            await asyncio.gather(*self.closing, return_exceptions=True)
+        logger.info("Swarm finished: %s", json.dumps(self.summary()))
+
+    async def report_periodically(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("Swarm: %s", json.dumps(self.summary()))
+
+    def packet_stats(self):
+        """Packet statistics of all clients merged into one PacketStats."""
+        merged = PacketStats()
+        merged.merge(self.retired_stats)
+        for client in self.clients:
+            if client.stats is not None:
+                merged.merge(client.stats)
+        return merged
+
+    def rtt_histogram(self):
+        """Ping RTT samples of all clients merged into one Histogram."""
+        merged = Histogram()
+        merged.merge(self.retired_rtt)
+        for client in self.clients:
+            merged.merge(client.latency.rtt_histogram)
+        return merged
+
+    def summary(self):
+        types = self.packet_stats().summary()
+        rtt = self.rtt_histogram()
+        running = [client.latency for client in self.clients if client.latency.frames]
+        return {
+            'clients': self.count,
+            'running': self.running,
+            'alive': sum(1 for client in self.clients if client.alive),
+            'failed': self.failed,
+            'finished': self.finished,
+            'deaths': self.deaths,
+            'sessions': self.sessions,
+            'uptime': time.time() - self.started,
+            'packets': sum(stats['count'] for stats in types.values()),
+            'packets_per_second': sum(stats['per_second'] for stats in types.values()),
+            'bytes_per_second': sum(stats['bytes_per_second'] for stats in types.values()),
+            'bytes_sent': self.retired_bytes_sent + sum(client.writer.bytes_sent for client in self.clients
+                                                        if client.writer is not None),
+            'rtt_p50_ms': rtt.percentile(50) / 1e6,
+            'rtt_p95_ms': rtt.percentile(95) / 1e6,
+            'rtt_p99_ms': rtt.percentile(99) / 1e6,
+            'jitter_ms': sum(latency.jitter for latency in running) / len(running) * 1000 if running else 0.0,
+            'lateness_ms': max((latency.lateness for latency in running), default=0.0) * 1000,
+            'types': types,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a swarm of headless slither.io clients.")
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--server', default=None)
+    parser.add_argument('--nickname-prefix', default="Bot")
+    parser.add_argument('--skins', type=int, nargs='*', default=None)
+    parser.add_argument('--connect-interval', type=float, default=0.05)
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--report-interval', type=float, default=10.0)
+    parser.add_argument('--respawn', action='store_true')
+    args = parser.parse_args()
+
+    swarm = Swarm(args.count, server_url=args.server, nickname_prefix=args.nickname_prefix, skins=args.skins,
+                  connect_interval=args.connect_interval, fps=args.fps, respawn=args.respawn)
+    return swarm.run(args.report_interval)
+
+
+if __name__ == "__main__":
+    # Per-client logging stays at WARNING; the swarm's own reports are INFO
+    log_listener = setup_logging(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
@@ -0,0 +1,78 @@
+"""
+Font registry and an LRU cache of rendered text surfaces.
+"""
+from collections import OrderedDict
+
+import pygame
+
+OUTLINE_OFFSETS = ((0, 0), (2, 0), (0, 2), (2, 2))
+
+
+class FontRegistry:
+    """Loads each (font name, size) once, on first use."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.fonts = {}
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.name, size)
+        return font
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (text, color, size, outline).
+
+    Outlined text is composited once into a single surface (four 1px diagonal
+    outline passes under the fill), so drawing it is one blit.  The least
+    recently used entries are evicted past max_entries.  Volatile text goes
+    through render_uncached so it never displaces names and the leaderboard.
+    """
+
+    def __init__(self, fonts=None, max_entries=512):
+        self.fonts = fonts or FontRegistry()
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, text, color, size, outline=None):
+        key = (text, color, size, outline)
+        surfaces = self.surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._render(text, color, size, outline)
+        surfaces[key] = surface
+        if len(surfaces) > self.max_entries:
+            surfaces.popitem(last=False)
+        return surface
+
+    def render_uncached(self, text, color, size, outline=None):
+        """Render text that changes every frame, such as counters, without evicting stable entries."""
+        return self._render(text, color, size, outline)
+
+    def _render(self, text, color, size, outline):
+        font = self.fonts.get(size)
+        fill = font.render(text, True, color)
+        if outline is None:
+            return fill
+        width, height = fill.get_size()
+        surface = pygame.Surface((width + 2, height + 2), pygame.SRCALPHA)
+        edge = font.render(text, True, outline)
+        for offset in OUTLINE_OFFSETS:
+            surface.blit(edge, offset)
+        surface.blit(fill, (1, 1))
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
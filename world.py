@@ -0,0 +1,562 @@
+"""
+Array-backed stores for the world state the client hears about from the server.
+"""
+from abc import ABC, abstractmethod
+from itertools import repeat
+
+import numpy as np
+
+from spatial import GridIndex, nearest_in_window
+
+# Hard-coded client defaults, used until the 'a' packet arrives
+DEFAULT_MSCPS = 300
+DEFAULT_SECTOR_SIZE = 480
+DEFAULT_SECTOR_COUNT_ALONG_EDGE = 130
+
+
+def food_key(x, y):
+    # x and y are uint16 on the wire, so packing them gives a unique key per position
+    return (int(x) << 16) | int(y)
+
+
+class ColumnStore:
+    """
+    Structure-of-arrays storage: one NumPy column per field, indexed by slot.
+
+    Subclasses list their fields in `columns` (name -> dtype) and any fields
+    holding Python objects in `object_columns`.  Released slots go on a free
+    list and are handed out again before the columns grow.
+    """
+
+    columns = {}
+    object_columns = ()
+
+    def __init__(self, capacity):
+        for name, dtype in self.columns.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        for name in self.object_columns:
+            setattr(self, name, [None] * capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.capacity = capacity
+        self.free = []
+        self.high_water = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in (*self.columns, 'alive'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.capacity] = column
+            setattr(self, name, grown)
+        for name in self.object_columns:
+            getattr(self, name).extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def allocate_one(self):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            self._grow(self.high_water + 1)
+            slot = self.high_water
+            self.high_water += 1
+        self.alive[slot] = True
+        self.count += 1
+        return slot
+
+    def allocate(self, count):
+        reused_count = min(count, len(self.free))
+        reused = self.free[len(self.free) - reused_count:]
+        del self.free[len(self.free) - reused_count:]
+        fresh_count = count - reused_count
+        self._grow(self.high_water + fresh_count)
+        fresh = np.arange(self.high_water, self.high_water + fresh_count, dtype=np.intp)
+        self.high_water += fresh_count
+        slots = np.concatenate((np.asarray(reused, dtype=np.intp), fresh))
+        self.alive[slots] = True
+        self.count += count
+        return slots
+
+    def release(self, slot):
+        self.alive[slot] = False
+        for name in self.object_columns:
+            getattr(self, name)[slot] = None
+        self.free.append(slot)
+        self.count -= 1
+
+    def release_many(self, slots):
+        self.alive[slots] = False
+        slot_list = slots.tolist()
+        for name in self.object_columns:
+            column = getattr(self, name)
+            for slot in slot_list:
+                column[slot] = None
+        self.free.extend(slot_list)
+        self.count -= len(slot_list)
+
+    def clear(self):
+        self.alive[:self.high_water] = False
+        for name in self.object_columns:
+            column = getattr(self, name)
+            column[:self.high_water] = [None] * self.high_water
+        self.free = []
+        self.high_water = 0
+        self.count = 0
+
+    def live_slots(self):
+        return np.flatnonzero(self.alive[:self.high_water])
+
+
+class EntityStore(ColumnStore, ABC):
+    """
+    Column store for entities with a uint16 server id (snakes and prey).
+
+    Ids map to slots through a dict holding only the live entities, so an
+    idle store stays small.  Every live entity is also kept in a GridIndex by
+    its bounds (see _index).
+    """
+
+    def __init__(self, capacity=256, cell_size=DEFAULT_SECTOR_SIZE):
+        super().__init__(capacity)
+        self.ids = np.zeros(capacity, dtype=np.uint16)
+        self.index = {}
+        self.grid = GridIndex(cell_size)
+
+    def configure_grid(self, cell_size):
+        self.grid = GridIndex(cell_size)
+        for slot in self.live_slots().tolist():
+            self._index(slot)
+
+    @abstractmethod
+    def _index(self, slot):
+        """Put a live slot into the grid by its current bounds."""
+
+    def _grow(self, needed):
+        if needed > self.capacity:
+            ids = self.ids
+            super()._grow(needed)
+            self.ids = np.zeros(self.capacity, dtype=np.uint16)
+            self.ids[:len(ids)] = ids
+
+    def __contains__(self, entity_id):
+        return entity_id in self.index
+
+    def slot(self, entity_id):
+        """Return the slot of an entity, or -1 if it is not known."""
+        return self.index.get(entity_id, -1)
+
+    def add(self, entity_id):
+        """Return the slot for an entity, allocating one if it is new."""
+        slot = self.index.get(entity_id, -1)
+        if slot < 0:
+            slot = self.allocate_one()
+            self.index[entity_id] = slot
+            self.ids[slot] = entity_id
+        return slot
+
+    def remove(self, entity_id):
+        """Forget an entity and return its former slot, or None if unknown."""
+        slot = self.index.pop(entity_id, None)
+        if slot is None:
+            return None
+        self.grid.remove(slot)
+        self.release(slot)
+        return slot
+
+    def remove_slots(self, slots):
+        for entity_id in self.ids[slots].tolist():
+            del self.index[entity_id]
+        for slot in slots.tolist():
+            self.grid.remove(slot)
+        self.release_many(slots)
+
+
+class SnakeStore(EntityStore):
+    columns = {
+        'head_x': np.float32,
+        'head_y': np.float32,
+        'ang': np.float32,
+        'wang': np.float32,
+        'ehang': np.float32,
+        'sp': np.float32,
+        'fam': np.float32,
+        'dir': np.int8,
+        'skin': np.uint8,
+        # Bounding box of the body; may be loose after tail drops until refreshed
+        'min_x': np.float32,
+        'min_y': np.float32,
+        'max_x': np.float32,
+        'max_y': np.float32,
+        'stale_parts': np.int32,
+        # Body part count, kept in step with the body for vectorized physics
+        'length': np.int32,
+        # Predicted head and the decaying offset left by the last correction
+        'pred_x': np.float32,
+        'pred_y': np.float32,
+        'err_x': np.float32,
+        'err_y': np.float32,
+    }
+    object_columns = ('body', 'name', 'custom_skin')
+
+    def set_body(self, slot, body):
+        self.body[slot] = body
+        self.length[slot] = len(body)
+        self.head_x[slot], self.head_y[slot] = body.head()
+        self._refresh_bounds(slot)
+
+    def push_head(self, slot, x, y, grow):
+        """Add a new head; a move (grow=False) also drops the tail."""
+        body = self.body[slot]
+        length = len(body)
+        if grow:
+            body.push_head(x, y)
+        else:
+            body.advance(x, y)
+        self.head_x[slot] = x
+        self.head_y[slot] = y
+        self.length[slot] = len(body)
+        if len(body) <= length:
+            self.stale_parts[slot] += 1
+        if x < self.min_x[slot]:
+            self.min_x[slot] = x
+        elif x > self.max_x[slot]:
+            self.max_x[slot] = x
+        if y < self.min_y[slot]:
+            self.min_y[slot] = y
+        elif y > self.max_y[slot]:
+            self.max_y[slot] = y
+        self._settle_bounds(slot, body)
+
+    def drop_tail(self, slot):
+        body = self.body[slot]
+        body.drop_tail()
+        self.length[slot] = len(body)
+        self.stale_parts[slot] += 1
+        self._settle_bounds(slot, body)
+
+    def _settle_bounds(self, slot, body):
+        # Tightening the box costs O(length), so it is done once per length tail drops
+        if self.stale_parts[slot] >= len(body):
+            self._refresh_bounds(slot)
+        else:
+            self._index(slot)
+
+    def _refresh_bounds(self, slot):
+        points = self.body[slot].points()
+        if len(points):
+            self.min_x[slot], self.min_y[slot] = points.min(axis=0)
+            self.max_x[slot], self.max_y[slot] = points.max(axis=0)
+        self.stale_parts[slot] = 0
+        self._index(slot)
+
+    def _index(self, slot):
+        self.grid.update(slot, self.min_x[slot], self.min_y[slot], self.max_x[slot], self.max_y[slot])
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the slots of snakes whose body box overlaps the rectangle."""
+        slots = self.grid.query(left, top, right, bottom)
+        overlap = ((self.min_x[slots] <= right) & (self.max_x[slots] >= left)
+                   & (self.min_y[slots] <= bottom) & (self.max_y[slots] >= top))
+        return slots[overlap]
+
+    def nearest(self, x, y, k=1, radius=500, max_radius=65536):
+        """Return (slots, distances) of the k snakes with a body part closest to (x, y)."""
+        def query(left, top, right, bottom):
+            slots = self.query_rect(left, top, right, bottom)
+            distances = np.array([np.hypot(*(self.body[slot].points() - (x, y)).T).min()
+                                  if len(self.body[slot]) else np.inf for slot in slots.tolist()])
+            return slots, distances
+        return nearest_in_window(query, x, y, k, radius, max_radius)
+
+
+class PreyStore(EntityStore):
+    columns = {
+        'x': np.float32,
+        'y': np.float32,
+        'size': np.float32,
+        'color': np.uint8,
+        'direction': np.int8,
+        'wanted_angle': np.float32,
+        'current_angle': np.float32,
+        'speed': np.float32,
+    }
+
+    def place(self, slot, x, y):
+        self.x[slot] = x
+        self.y[slot] = y
+        self._index(slot)
+
+    def _index(self, slot):
+        x, y = self.x[slot], self.y[slot]
+        self.grid.update(slot, x, y, x, y)
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the slots of prey inside [left, right] x [top, bottom]."""
+        slots = self.grid.query(left, top, right, bottom)
+        x, y = self.x[slots], self.y[slots]
+        return slots[(x >= left) & (x <= right) & (y >= top) & (y <= bottom)]
+
+    def nearest(self, x, y, k=1, radius=500, max_radius=65536):
+        """Return (slots, distances) of the k prey closest to (x, y)."""
+        def query(left, top, right, bottom):
+            slots = self.query_rect(left, top, right, bottom)
+            return slots, np.hypot(self.x[slots] - x, self.y[slots] - y)
+        return nearest_in_window(query, x, y, k, radius, max_radius)
+
+    def remove_in_rect(self, left, top, right, bottom):
+        """Drop every prey inside [left, right) x [top, bottom) and return how many went."""
+        slots = self.query_rect(left, top, right, bottom)
+        x, y = self.x[slots], self.y[slots]
+        slots = slots[(x < right) & (y < bottom)]
+        if len(slots):
+            self.remove_slots(slots)
+        return len(slots)
+
+
+class FoodStore(ColumnStore):
+    """
+    Food columns (x, y, color index, size) indexed by slot.
+
+    Positions map to slots through a dict keyed by food_key, which is filled and
+    queried in bulk so a whole F/f/b packet is inserted without a Python loop.
+    """
+
+    columns = {
+        'x': np.uint16,
+        'y': np.uint16,
+        'color': np.uint8,
+        'size': np.float32,
+    }
+
+    def __init__(self, capacity=1024):
+        super().__init__(capacity)
+        self.index = {}
+
+    def clear(self):
+        super().clear()
+        self.index.clear()
+
+    def add_batch(self, foods):
+        """
+        Insert a structured array with color, x, y and raw size (value * 5) fields.
+
+        Food already known at a position is overwritten in place.
+        """
+        if len(foods) == 0:
+            return
+        keys = (foods['x'].astype(np.int64) << 16) | foods['y']
+        # The last entry for a position wins, as it would with one write per food
+        keys, last = np.unique(keys[::-1], return_index=True)
+        foods = foods[::-1][last]
+
+        key_list = keys.tolist()
+        slots = np.fromiter(map(self.index.get, key_list, repeat(-1)), dtype=np.intp, count=len(key_list))
+        new = slots < 0
+        new_count = int(np.count_nonzero(new))
+        if new_count:
+            slots[new] = self.allocate(new_count)
+            self.index.update(zip(keys[new].tolist(), slots[new].tolist()))
+
+        self.x[slots] = foods['x']
+        self.y[slots] = foods['y']
+        self.color[slots] = foods['color']
+        self.size[slots] = foods['size'] / 5
+
+    def get(self, x, y):
+        return self.index.get(food_key(x, y))
+
+    def remove(self, x, y):
+        """Drop the food at (x, y) and return its former slot, or None if unknown."""
+        slot = self.index.pop(food_key(x, y), None)
+        if slot is not None:
+            self.release(slot)
+        return slot
+
+
+class SectorFoodStore:
+    """
+    Food partitioned into one FoodStore per server sector.
+
+    Sectors are keyed by sy * edge + sx.  A 'W' packet preallocates a sector
+    and a 'w' packet drops the whole sector at once, so food that leaves the
+    active area never accumulates.  Dropped stores are kept in a small pool and
+    reused for the next sectors that become active.
+    """
+
+    def __init__(self, sector_size=DEFAULT_SECTOR_SIZE, sector_count_along_edge=DEFAULT_SECTOR_COUNT_ALONG_EDGE,
+                 sector_capacity=32, pool_size=64):
+        self.sector_capacity = sector_capacity
+        self.pool_size = pool_size
+        self.pool = []
+        self.sectors = {}
+        self.configure(sector_size, sector_count_along_edge)
+
+    def configure(self, sector_size, sector_count_along_edge):
+        """Apply the sector geometry from the 'a' packet, dropping all known food."""
+        self.sector_size = sector_size or DEFAULT_SECTOR_SIZE
+        # Cover every uint16 food coordinate even if the server undercounts the edge
+        self.edge = max(sector_count_along_edge, 0xFFFF // self.sector_size + 1)
+        for key in list(self.sectors):
+            self._drop(key)
+
+    def __len__(self):
+        return sum(len(store) for store in self.sectors.values())
+
+    def sector_key(self, sector_x, sector_y):
+        return sector_y * self.edge + sector_x
+
+    def add_sector(self, sector_x, sector_y):
+        key = self.sector_key(sector_x, sector_y)
+        store = self.sectors.get(key)
+        if store is None:
+            store = self.pool.pop() if self.pool else FoodStore(self.sector_capacity)
+            self.sectors[key] = store
+        return store
+
+    def remove_sector(self, sector_x, sector_y):
+        """Drop a sector and return how much food went with it."""
+        return self._drop(self.sector_key(sector_x, sector_y))
+
+    def _drop(self, key):
+        store = self.sectors.pop(key, None)
+        if store is None:
+            return 0
+        dropped = len(store)
+        if len(self.pool) < self.pool_size:
+            store.clear()
+            self.pool.append(store)
+        return dropped
+
+    def _store_at(self, x, y):
+        return self.sectors.get(self.sector_key(int(x) // self.sector_size, int(y) // self.sector_size))
+
+    def add_batch(self, foods):
+        if len(foods) == 0:
+            return
+        keys = (foods['y'] // self.sector_size).astype(np.intp) * self.edge + foods['x'] // self.sector_size
+        if (keys == keys[0]).all():
+            self._sector_for_key(int(keys[0])).add_batch(foods)
+            return
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.diff(sorted_keys)) + 1
+        for group, key in zip(np.split(order, starts), sorted_keys[np.concatenate(([0], starts))].tolist()):
+            self._sector_for_key(key).add_batch(foods[group])
+
+    def _sector_for_key(self, key):
+        return self.add_sector(key % self.edge, key // self.edge)
+
+    def remove(self, x, y):
+        """Drop the food at (x, y) and return its (color index, size), or None if unknown."""
+        store = self._store_at(x, y)
+        if store is None:
+            return None
+        slot = store.remove(x, y)
+        if slot is None:
+            return None
+        return int(store.color[slot]), float(store.size[slot])
+
+    def columns(self):
+        """Return x, y, color index and size arrays of every known food."""
+        return self._concatenate(self.sectors.values())
+
+    def columns_in_rect(self, left, top, right, bottom):
+        """Return x, y, color index and size arrays of the food inside [left, right] x [top, bottom]."""
+        size = self.sector_size
+        sx0, sy0 = max(int(left // size), 0), max(int(top // size), 0)
+        sx1, sy1 = min(int(right // size), self.edge - 1), min(int(bottom // size), self.edge - 1)
+        if sx1 < sx0 or sy1 < sy0:
+            return self._concatenate(())
+        if (sx1 - sx0 + 1) * (sy1 - sy0 + 1) > len(self.sectors):
+            stores = [store for key, store in self.sectors.items()
+                      if sx0 <= key % self.edge <= sx1 and sy0 <= key // self.edge <= sy1]
+        else:
+            stores = [store for store in (self.sectors.get(sy * self.edge + sx)
+                                          for sy in range(sy0, sy1 + 1) for sx in range(sx0, sx1 + 1))
+                      if store is not None]
+        x, y, color, food_size = self._concatenate(stores)
+        inside = (x >= left) & (x <= right) & (y >= top) & (y <= bottom)
+        return x[inside], y[inside], color[inside], food_size[inside]
+
+    def nearest(self, x, y, k=1, radius=None, max_radius=65536):
+        """Return (xs, ys, distances) of the k foods closest to (x, y)."""
+        def query(left, top, right, bottom):
+            xs, ys = self.columns_in_rect(left, top, right, bottom)[:2]
+            keys = (xs.astype(np.int64) << 16) | ys
+            return keys, np.hypot(xs - x, ys - y)
+        keys, distances = nearest_in_window(query, x, y, k, radius or self.sector_size, max_radius)
+        return keys >> 16, keys & 0xFFFF, distances
+
+    @staticmethod
+    def _concatenate(stores):
+        parts = []
+        for store in stores:
+            if store.count:
+                slots = store.live_slots()
+                parts.append((store.x[slots], store.y[slots], store.color[slots], store.size[slots]))
+        if not parts:
+            empty = np.empty(0, dtype=np.uint16)
+            return empty, empty, np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.float32)
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+class SnakeBody:
+    """
+    Fixed-capacity ring buffer of body parts, tail first and head last.
+
+    Every part is written twice, at i and i + capacity, so the live parts are
+    always one contiguous slice of the buffer and points() never copies.
+    Appending a head and dropping the tail are both O(1).
+    """
+
+    __slots__ = ('buffer', 'capacity', 'start', 'length')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity * 2, 2), dtype=np.float32)
+        self.start = 0
+        self.length = 0
+
+    @classmethod
+    def from_points(cls, points, capacity):
+        points = points[-capacity:]
+        body = cls(capacity)
+        body.length = len(points)
+        body.buffer[:body.length] = points
+        body.buffer[capacity:capacity + body.length] = points
+        return body
+
+    def __len__(self):
+        return self.length
+
+    def points(self):
+        return self.buffer[self.start:self.start + self.length]
+
+    def head(self):
+        x, y = self.buffer[self.start + self.length - 1]
+        return float(x), float(y)
+
+    def push_head(self, x, y):
+        if self.length == self.capacity:
+            self.drop_tail()
+        index = (self.start + self.length) % self.capacity
+        self.buffer[index] = self.buffer[index + self.capacity] = (x, y)
+        self.length += 1
+
+    def drop_tail(self):
+        if self.length:
+            self.start = (self.start + 1) % self.capacity
+            self.length -= 1
+
+    def advance(self, x, y):
+        # A move keeps the length: the tail follows and a new head is added
+        if self.length > 1:
+            self.drop_tail()
+        self.push_head(x, y)
@@ -0,0 +1,108 @@
+"""
+Single outbound writer for serverbound packets.
+"""
+import asyncio
+import heapq
+
+import websockets
+
+# Lower sends first; equal priorities keep their order
+PRIORITY_CONTROL = 0
+PRIORITY_BOOST = 1
+PRIORITY_ROTATION = 2
+PRIORITY_PING = 3
+
+
+class OutboundWriter:
+    """
+    One task that owns ws.send for a connection.
+
+    Packets are queued with a priority and written in (priority, arrival)
+    order, one at a time.  ws.send waits while the transport's write buffer is
+    above its limit, which is the backpressure: nothing else can overtake or
+    interleave with a packet in flight.
+
+    Rotations are not queued.  At most one is pending, and a newer rotation
+    replaces it, so a slow socket delays steering by at most one packet and
+    the angle that finally goes out is the newest one.  Boost on/off and
+    everything else is queued and never dropped.
+
+    A queued packet can carry an on_sent callback, called right after its
+    ws.send returns; pings use it so RTT is measured from the actual write.
+    """
+
+    def __init__(self, ws, max_pending=64):
+        self.ws = ws
+        self.max_pending = max_pending
+        self.queue = []
+        self.sequence = 0
+        self.rotation = None
+        self.ready = asyncio.Event()
+        self.space = asyncio.Event()
+        self.space.set()
+        self.task = None
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.rotations_coalesced = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        task, self.task = self.task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def post(self, message, priority=PRIORITY_CONTROL, on_sent=None):
+        """Queue a packet without waiting; for handlers and other synchronous callers."""
+        heapq.heappush(self.queue, (priority, self.sequence, message, on_sent))
+        self.sequence += 1
+        if len(self.queue) >= self.max_pending:
+            self.space.clear()
+        self.ready.set()
+
+    async def send(self, message, priority=PRIORITY_CONTROL, on_sent=None):
+        """Queue a packet, first waiting while max_pending packets are queued."""
+        await self.space.wait()
+        self.post(message, priority, on_sent)
+
+    def post_rotation(self, message):
+        if self.rotation is not None:
+            self.rotations_coalesced += 1
+        self.rotation = message
+        self.ready.set()
+
+    def pending(self):
+        return len(self.queue) + (self.rotation is not None)
+
+    def next_message(self):
+        """(message, on_sent) to write next, or None when nothing is pending."""
+        queue = self.queue
+        if self.rotation is not None and (not queue or queue[0][0] > PRIORITY_ROTATION):
+            message, self.rotation = self.rotation, None
+            return message, None
+        if not queue:
+            return None
+        _, _, message, on_sent = heapq.heappop(queue)
+        if len(queue) < self.max_pending:
+            self.space.set()
+        return message, on_sent
+
+    async def run(self):
+        while True:
+            entry = self.next_message()
+            if entry is None:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            message, on_sent = entry
+            try:
+                await self.ws.send(message)
+            except websockets.ConnectionClosed:
+                # The listener sees the close and ends the session
+                return
+            self.bytes_sent += len(message)
+            self.packets_sent += 1
+            if on_sent is not None:
+                on_sent()